@@ -28,10 +28,10 @@ def parse_demographics_response(response: str) -> tuple:
         elif "жен" in line.lower() or "женский" in line.lower():
             gender = "Женский"
         
-        # Ищем образование
-        educ_options = ["среднее", "высшее", "средне-специальное", 
-                       "высшее неоконченное", "среднее неоконченное", 
-                       "средне-специальное неоконченное"]
+        # Ищем образование (сначала более длинные варианты: "среднее неоконченное" раньше "среднее")
+        educ_options = ["средне-специальное неоконченное", "высшее неоконченное",
+                       "среднее неоконченное", "средне-специальное",
+                       "среднее", "высшее"]
         
         for educ in educ_options:
             if educ in line.lower():
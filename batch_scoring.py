@@ -0,0 +1,202 @@
+# Пакетный офлайн-пересчет записанных сессий.
+# Читает JSONL с транскриптами потоково, кусками по --chunk-size строк, и
+# раздает куски пулу процессов. Каждый процесс заново разбирает демографию и
+# ответы (parse_demographics_response, parse_answer_score) и строит профиль.
+# Результаты пишутся в том же порядке и тоже потоково. Шаг LLM (рекомендации)
+# по желанию заменяется записанным ответом, кэшем или фейковым LLM.
+#
+# Формат входной строки:
+#   {"session_id": "...", "demographics": "Мужской\n25\nВысшее",
+#    "answers": [{"type": "R", "answer": "Скорее да"}, ...],
+#    "recommendations": "записанный ответ LLM (необязательно)"}
+# Вместо объектов в "answers" можно передать строки в порядке HOLLAND_TYPES_ORDER.
+#
+# Пример:
+#   python batch_scoring.py sessions.jsonl -o rescored.jsonl --workers 8 --llm recorded
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from answer_parsing import parse_demographics_response, parse_answer_score
+from config import HOLLAND_TYPES_ORDER
+from holland_session import HollandTestSession
+from holland_user_prompt import analyze_profile_for_clarification
+from professions_list import get_professions_for_types, format_professions_for_prompt
+from profession_matcher import validate_recommendations
+from recomendation_prompt import generate_recommendation_prompt
+
+LLM_MODES = ("none", "recorded", "cache", "fake")
+# Сколько кусков может находиться в работе одновременно на один процесс
+CHUNKS_IN_FLIGHT_PER_WORKER = 4
+
+# Состояние процесса-воркера (заполняется в _init_worker)
+_WORKER = {"llm_mode": "none", "cache": {}, "fake_llm": None}
+
+
+def prompt_hash(prompt: str) -> str:
+    """Ключ кэша ответов LLM по тексту промпта"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def load_llm_cache(path: str) -> Dict[str, str]:
+    """Загрузить кэш ответов LLM: JSONL со строками {"prompt_hash": ..., "response": ...}"""
+    cache = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                cache[item["prompt_hash"]] = item["response"]
+    return cache
+
+
+def _init_worker(llm_mode: str, cache_path: Optional[str]):
+    _WORKER["llm_mode"] = llm_mode
+    if llm_mode == "cache" and cache_path:
+        _WORKER["cache"] = load_llm_cache(cache_path)
+    if llm_mode == "fake":
+        from fake_llm import FakeLLMClient
+        _WORKER["fake_llm"] = FakeLLMClient()
+
+
+def _iter_answers(answers: list):
+    for index, item in enumerate(answers):
+        if isinstance(item, dict):
+            yield item.get("type"), item.get("answer", "")
+        elif index < len(HOLLAND_TYPES_ORDER):
+            yield HOLLAND_TYPES_ORDER[index], item
+
+
+def _recommendation_response(record: Dict, prompt: str) -> Optional[str]:
+    mode = _WORKER["llm_mode"]
+    if mode == "recorded":
+        return record.get("recommendations")
+    if mode == "cache":
+        return _WORKER["cache"].get(prompt_hash(prompt))
+    if mode == "fake":
+        return _WORKER["fake_llm"].generate_response(prompt)
+    return None
+
+
+def score_record(record: Dict) -> Dict:
+    """Пересчитать одну записанную сессию"""
+    age, gender, education = parse_demographics_response(record.get("demographics", ""))
+    session = HollandTestSession()
+    if age and gender and education:
+        session.set_demographics(age, gender, education)
+
+    for type_code, answer in _iter_answers(record.get("answers", [])):
+        if type_code in session.scores:
+            session.add_answer(type_code, parse_answer_score(answer), question=None, answer=answer)
+
+    result = {
+        "session_id": record.get("session_id"),
+        "demographics": {"age": age, "gender": gender, "education": education},
+        "scores": session.scores,
+        "holland_code": session.get_top_code(),
+        "profile": session.get_initial_profile(),
+        "analysis": analyze_profile_for_clarification(session.scores),
+        "questions_answered": session.questions_asked
+    }
+
+    if _WORKER["llm_mode"] != "none":
+        professions_by_type = get_professions_for_types(
+            session.get_recommended_types(), limit_per_type=10, demographics=session.demographics
+        )
+        prompt = generate_recommendation_prompt(
+            session.scores, session.demographics, format_professions_for_prompt(professions_by_type)
+        )
+        response = _recommendation_response(record, prompt)
+        if response is None:
+            result["recommendations"] = None
+        else:
+            check = validate_recommendations(response, professions_by_type)
+            result["recommendations"] = {"matched": check["matched"], "unknown": check["unknown"]}
+
+    return result
+
+
+def process_chunk(first_line: int, lines: List[str]) -> str:
+    """Обработать кусок входных строк и вернуть готовый кусок выходного JSONL"""
+    out = []
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            result = score_record(json.loads(line))
+        except Exception as e:
+            result = {"line": first_line + offset, "error": f"{type(e).__name__}: {e}"}
+        out.append(json.dumps(result, ensure_ascii=False))
+    return "\n".join(out) + "\n" if out else ""
+
+
+def _read_chunks(f, chunk_size: int):
+    line_number = 1
+    while True:
+        lines = list(itertools.islice(f, chunk_size))
+        if not lines:
+            return
+        yield line_number, lines
+        line_number += len(lines)
+
+
+def run(input_file, output_file, workers: int, chunk_size: int, llm_mode: str,
+        cache_path: Optional[str] = None) -> Dict:
+    """Пересчитать все сессии из input_file и записать результаты в output_file
+
+    Returns:
+        dict: статистика прогона
+    """
+    started = time.perf_counter()
+    lines = 0
+    max_in_flight = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(llm_mode, cache_path)) as pool:
+        # Pool.imap вычитал бы весь вход заранее, поэтому держим ограниченное окно
+        # кусков в работе и пишем результаты строго по порядку
+        pending = deque()
+        for first_line, chunk in _read_chunks(input_file, chunk_size):
+            lines += len(chunk)
+            pending.append(pool.apply_async(process_chunk, (first_line, chunk)))
+            if len(pending) >= max_in_flight:
+                output_file.write(pending.popleft().get())
+        while pending:
+            output_file.write(pending.popleft().get())
+
+    elapsed = time.perf_counter() - started
+    return {"lines": lines, "seconds": elapsed, "lines_per_sec": lines / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный пересчет записанных сессий CARA")
+    parser.add_argument("input", help="входной JSONL ('-' для stdin)")
+    parser.add_argument("-o", "--output", default="-", help="выходной JSONL ('-' для stdout)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=2000, help="строк в одном куске")
+    parser.add_argument("--llm", choices=LLM_MODES, default="none",
+                        help="источник ответов LLM для рекомендаций")
+    parser.add_argument("--llm-cache", help="JSONL-кэш ответов LLM для --llm cache")
+    args = parser.parse_args()
+
+    if args.llm == "cache" and not args.llm_cache:
+        parser.error("для --llm cache нужен --llm-cache")
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run(input_file, output_file, args.workers, args.chunk_size, args.llm, args.llm_cache)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
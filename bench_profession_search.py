@@ -0,0 +1,72 @@
+# Бенчмарк поиска профессий: индекс (префиксное дерево + триграммы)
+# против линейного прохода по professions.txt.
+#
+#   python bench_profession_search.py --iterations 200
+import argparse
+import difflib
+import time
+
+from professions_list import load_professions_catalog
+from profession_search import ProfessionSearchIndex, search_key
+
+QUERIES = [
+    "дизайн",               # автодополнение
+    "Бухгалтер",            # точное название
+    "web дизайнер",         # смешанная латиница/кириллица
+    "dizainer",             # транслит
+    "свпрщик",              # опечатка
+    "инжинер конструктор",  # опечатка в составном названии
+    "менеджр по продажам"
+]
+
+
+def naive_search(names: list, query: str, k: int = 10) -> list:
+    """Линейный проход: совпадения по подстроке, затем похожесть difflib"""
+    q = query.lower()
+    hits = [name for name in names if q in name.lower()]
+    if len(hits) >= k:
+        return hits[:k]
+    scored = sorted(names, key=lambda name: difflib.SequenceMatcher(None, q, name.lower()).ratio(),
+                    reverse=True)
+    return (hits + [name for name in scored if name not in hits])[:k]
+
+
+def naive_substring(names: list, query: str, k: int = 10) -> list:
+    """Линейный проход только по подстроке (без устойчивости к опечаткам)"""
+    q = query.lower()
+    return [name for name in names if q in name.lower()][:k]
+
+
+def timed(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска профессий")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = load_professions_catalog()
+    names = list(catalog)
+
+    started = time.perf_counter()
+    index = ProfessionSearchIndex(catalog)
+    print(f"построение индекса: {(time.perf_counter() - started) * 1000:.0f} мс, профессий: {len(names)}\n")
+
+    print(f"{'запрос':<22}{'индекс, мс':>12}{'подстрока, мс':>15}{'difflib, мс':>13}  первый результат")
+    for query in QUERIES:
+        index_ms = timed(lambda: index.search(query, 10), args.iterations)
+        substring_ms = timed(lambda: naive_substring(names, query, 10), args.iterations)
+        difflib_ms = timed(lambda: naive_search(names, query, 10), max(1, args.iterations // 50))
+        results = index.search(query, 1)
+        top = results[0]["name"] if results else "-"
+        print(f"{query:<22}{index_ms:>12.3f}{substring_ms:>15.3f}{difflib_ms:>13.1f}  {top}")
+
+    print(f"\nключ поиска для 'Web-дизайнер': {search_key('Web-дизайнер')!r}")
+
+
+if __name__ == "__main__":
+    main()
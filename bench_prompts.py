@@ -0,0 +1,82 @@
+# Бенчмарк сборки промпта рекомендаций: кэшированные блоки профессий по типам
+# против исходного форматирования списка профессий на каждом вызове.
+# Промпты вопросов и уточнений остаются исходными f-строками: CPython собирает
+# их за один проход, и предварительная компиляция шаблонов выигрыша не дала.
+#
+#   python bench_prompts.py --iterations 20000
+import argparse
+import timeit
+import tracemalloc
+
+from professions_list import format_professions_for_prompt, get_professions_for_types
+from recomendation_prompt import generate_recommendation_prompt
+
+DEMOGRAPHICS = {"age": 19, "gender": "Женский", "education": "Высшее неоконченное"}
+SCORES = {"R": 1, "I": 2, "A": -1, "S": 2, "E": 0, "C": -2}
+PROFESSIONS = get_professions_for_types(["I", "S", "R"], limit_per_type=10)
+
+
+def baseline_format_professions_for_prompt(professions_by_type: dict) -> str:
+    """Исходная реализация format_professions_for_prompt (до кэширования блоков)"""
+    formatted = []
+    type_names = {
+        "R": "РЕАЛИСТИЧЕСКИЙ (Realistic - R)",
+        "I": "ИССЛЕДОВАТЕЛЬСКИЙ (Investigative - I)",
+        "A": "АРТИСТИЧЕСКИЙ (Artistic - A)",
+        "S": "СОЦИАЛЬНЫЙ (Social - S)",
+        "E": "ПРЕДПРИНИМАТЕЛЬСКИЙ (Enterprising - E)",
+        "C": "КОНВЕНЦИОНАЛЬНЫЙ (Conventional - C)"
+    }
+
+    for type_code, professions in professions_by_type.items():
+        type_name = type_names.get(type_code, type_code)
+        formatted.append(f"{type_name}:")
+        for prof in professions:
+            formatted.append(f"   - {prof}")
+        formatted.append("")
+
+    return "\n".join(formatted)
+
+
+CASES = [
+    ("professions_data",
+     lambda: baseline_format_professions_for_prompt(PROFESSIONS),
+     lambda: format_professions_for_prompt(PROFESSIONS)),
+    ("recommendation",
+     lambda: generate_recommendation_prompt(SCORES, DEMOGRAPHICS,
+                                            baseline_format_professions_for_prompt(PROFESSIONS)),
+     lambda: generate_recommendation_prompt(SCORES, DEMOGRAPHICS,
+                                            format_professions_for_prompt(PROFESSIONS)))
+]
+
+
+def measure(func, iterations: int) -> dict:
+    func()  # прогрев кэшей
+    seconds = min(timeit.repeat(func, number=iterations, repeat=3)) / iterations
+
+    # Пиковый объем временной памяти за один вызов
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    func()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return {"us": seconds * 1e6, "peak_bytes": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сборки промпта рекомендаций")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'промпт':<18}{'было, мкс':>12}{'стало, мкс':>12}{'ускорение':>11}"
+          f"{'пик было, Б':>14}{'пик стало, Б':>14}")
+    for name, naive, cached in CASES:
+        assert naive() == cached(), f"{name}: результаты не совпадают"
+        before = measure(naive, args.iterations)
+        after = measure(cached, args.iterations)
+        print(f"{name:<18}{before['us']:>12.2f}{after['us']:>12.2f}{before['us'] / after['us']:>10.1f}x"
+              f"{before['peak_bytes']:>14}{after['peak_bytes']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,5 +8,60 @@ EDUCATION_LEVELS = [
     "Среднее неоконченное",
     "Средне-специальное неоконченное"
 ]
+# Ступени образования: неоконченный уровень стоит на ступень ниже законченного
+EDUCATION_RANK = {
+    "Среднее неоконченное": 0,
+    "Среднее": 1,
+    "Средне-специальное неоконченное": 1,
+    "Средне-специальное": 2,
+    "Высшее неоконченное": 2,
+    "Высшее": 3
+}
+# Возрастные группы: (верхняя граница возраста, не включая; название)
+AGE_GROUPS = [
+    (18, "школьник"),
+    (25, "молодой специалист/студент"),
+    (45, "профессионал"),
+    (None, "опытный специалист")
+]
+# На сколько ступеней образования выше текущей еще можно рассчитывать в этой группе.
+# Школьники и студенты только выбирают путь, поэтому им доступно и высшее образование
+EDUCATION_REACH_BY_AGE_GROUP = {
+    "школьник": 3,
+    "молодой специалист/студент": 3,
+    "профессионал": 0,
+    "опытный специалист": 0
+}
 # Порядок тестирования типов
-HOLLAND_TYPES_ORDER = ["R", "I", "A", "S", "E", "C"]
\ No newline at end of file
+HOLLAND_TYPES_ORDER = ["R", "I", "A", "S", "E", "C"]
+
+# Приоритеты вызовов LLM по этапам (меньше — важнее)
+LLM_STAGE_PRIORITIES = {
+    "demographics": 0,
+    "basic_test": 0,
+    "clarification": 0,
+    "recommendations": 1
+}
+# Лимиты одновременных вызовов LLM на класс приоритета
+LLM_CLASS_CONCURRENCY = {0: 8, 1: 2}
+# Максимальная длина очереди на класс приоритета (сверх — отказ "занято")
+LLM_CLASS_MAX_QUEUE = {0: 64, 1: 8}
+# Максимальное время ожидания в очереди, сек
+LLM_CLASS_MAX_WAIT = {0: 10.0, 1: 30.0}
+# Квота провайдера: запросов в секунду и размер "пачки"
+LLM_RATE_LIMIT_PER_SEC = 5.0
+LLM_RATE_LIMIT_BURST = 10
+
+# Режим проверки рекомендаций LLM по списку профессий: "flag" или "strip"
+RECOMMENDATION_VALIDATION_MODE = "flag"
+
+# Лимиты памяти на сессию (приблизительно, в байтах объектов Python)
+SESSION_MAX_PROMPT_BYTES = 64 * 1024
+SESSION_MAX_HISTORY_BYTES = 256 * 1024
+SESSION_MAX_LLM_OUTPUT_BYTES = 128 * 1024
+# Максимальная длина ответа пользователя, который передается в разбор, символов
+SESSION_MAX_ANSWER_CHARS = 2000
+# Что делать с историей при превышении лимита: "truncate", "spill" или "drop_oldest"
+SESSION_MEMORY_POLICY = "truncate"
+# Куда выгружать историю при политике "spill"
+SESSION_SPILL_DIR = "session_spill"
@@ -0,0 +1,82 @@
+# Фейковый LLM-клиент для локальных нагрузочных тестов и симуляций.
+# Повторяет интерфейс llm_client оркестратора (set_system_prompt / generate_response),
+# отвечает мгновенно и детерминированно, считает вызовы и токены.
+import re
+import time
+
+_TYPE_PATTERN = re.compile(r"склонности к типу \[(\w)\]")
+_PROFESSION_PATTERN = re.compile(r"^ +- (.+)$", re.MULTILINE)
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов (около 4 символов на токен)"""
+    return max(1, len(text) // 4)
+
+class FakeLLMClient:
+    """LLM-заглушка с учетом вызовов, токенов и модельного времени ответа"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        base_latency: float = 0.5,
+        latency_per_token: float = 0.02
+    ):
+        # latency — реальная задержка (time.sleep), чтобы нагружать сервер;
+        # base_latency и latency_per_token — модель времени ответа провайдера,
+        # которая только накапливается в simulated_time
+        self.latency = latency
+        self.base_latency = base_latency
+        self.latency_per_token = latency_per_token
+        self.system_prompt = None
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.simulated_time = 0.0
+
+    def set_system_prompt(self, prompt: str):
+        self.system_prompt = prompt
+
+    def generate_response(self, prompt: str) -> str:
+        response = self._render_response(prompt)
+
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        if self.system_prompt:
+            self.prompt_tokens += estimate_tokens(self.system_prompt)
+        completion = estimate_tokens(response)
+        self.completion_tokens += completion
+        self.simulated_time += self.base_latency + completion * self.latency_per_token
+
+        if self.latency:
+            time.sleep(self.latency)
+        return response
+
+    def _render_response(self, prompt: str) -> str:
+        if "СПИСОК ПРОФЕССИЙ ДЛЯ ВЫБОРА" in prompt:
+            professions_block = prompt.split("СПИСОК ПРОФЕССИЙ ДЛЯ ВЫБОРА", 1)[1]
+            professions = _PROFESSION_PATTERN.findall(professions_block)[:5]
+            items = "\n".join(f"- {name} — подходит под ваш профиль" for name in professions)
+            return f"РЕКОМЕНДАЦИИ ПРОФЕССИЙ:\n{items}"
+
+        match = _TYPE_PATTERN.search(prompt)
+        if match:
+            type_code = match.group(1)
+            return (f"[{type_code}] Нравится ли вам заниматься такими задачами?\n"
+                    "Определенно да / Скорее да / Нейтрально / Скорее нет / Определенно нет")
+
+        if "уточняющий вопрос" in prompt:
+            return ("Что привлекает больше: глубокая проработка задачи или быстрый практический результат?\n"
+                    "Определенно да / Скорее да / Нейтрально / Скорее нет / Определенно нет")
+
+        return ("Здравствуйте! Я CARA, помощник по профориентации.\n"
+                "1. Укажите ваш пол (Мужской/Женский).\n"
+                "2. Сколько вам полных лет?\n"
+                "3. Укажите ваш уровень образования.")
+
+    def get_usage(self) -> dict:
+        """Статистика использования"""
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "simulated_time": self.simulated_time
+        }
@@ -0,0 +1,84 @@
+# Состояние тестовой сессии по методике Холланда
+from typing import Dict, Optional
+from config import HOLLAND_TYPES_ORDER
+
+# Сколько уточняющих вопросов задавать после базового теста (3-5 по системному промпту)
+DEFAULT_MAX_CLARIFICATION_QUESTIONS = 3
+
+class HollandTestSession:
+    """Сессия теста: этап, демография, история ответов и баллы по типам"""
+
+    def __init__(self, max_clarification_questions: int = DEFAULT_MAX_CLARIFICATION_QUESTIONS):
+        self.stage = "demographics"
+        self.demographics = {}
+        self.history = []
+        self.scores = {type_code: 0 for type_code in HOLLAND_TYPES_ORDER}
+        self.questions_asked = 0
+        self.clarification_questions_asked = 0
+        self.max_clarification_questions = max_clarification_questions
+
+    def set_demographics(self, age: int, gender: str, education: str):
+        """Сохранить демографию и перейти к базовому тесту"""
+        self.demographics = {"age": age, "gender": gender, "education": education}
+        self.stage = "basic_test"
+
+    def get_next_type(self) -> Optional[str]:
+        """Получить следующий тип для базового теста (None, если все пройдены)"""
+        answered = {item["type"] for item in self.history}
+        for type_code in HOLLAND_TYPES_ORDER:
+            if type_code not in answered:
+                return type_code
+        return None
+
+    def add_answer(self, type_code: str, score: int, question: str, answer: str):
+        """Добавить ответ на вопрос базового теста"""
+        self.history.append({
+            "type": type_code,
+            "score": score,
+            "question": question,
+            "answer": answer
+        })
+        self.scores[type_code] = self.scores.get(type_code, 0) + score
+        self.questions_asked += 1
+
+    def get_type_history_summary(self) -> str:
+        """Краткая история ответов для промпта"""
+        if not self.history:
+            return "Пока нет ответов."
+        return ", ".join(f"{item['type']}({item['score']:+d})" for item in self.history)
+
+    def increment_clarification_count(self):
+        self.clarification_questions_asked += 1
+
+    def should_ask_clarification(self) -> bool:
+        """Нужно ли задавать еще уточняющие вопросы"""
+        return self.clarification_questions_asked < self.max_clarification_questions
+
+    def get_top_code(self, n: int = 3) -> str:
+        """Код Холланда из N наиболее выраженных типов (например, "RIC")"""
+        sorted_types = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
+        return "".join(type_code for type_code, _ in sorted_types[:n])
+
+    def get_recommended_types(self, max_types: int = 3) -> list:
+        """Типы для подбора профессий: до max_types наиболее выраженных с баллом >= 0,
+        а если все баллы отрицательные — один наименее отрицательный"""
+        sorted_types = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
+        recommended = [t for t, s in sorted_types if s >= 0][:max_types]
+        return recommended or [sorted_types[0][0]]
+
+    def get_initial_profile(self) -> str:
+        """Первоначальный профиль пользователя по баллам"""
+        sorted_types = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
+        scores_text = ", ".join(f"{t}({s:+d})" for t, s in sorted_types)
+        return f"Код Холланда: {self.get_top_code()}; баллы: {scores_text}"
+
+    def get_current_progress(self) -> Dict:
+        """Сводка по прогрессу сессии"""
+        return {
+            "stage": self.stage,
+            "demographics": self.demographics,
+            "scores": self.scores,
+            "questions_asked": self.questions_asked,
+            "clarification_questions_asked": self.clarification_questions_asked,
+            "holland_code": self.get_top_code()
+        }
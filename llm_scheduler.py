@@ -0,0 +1,177 @@
+# Планировщик вызовов LLM с приоритетами по этапам теста.
+# Короткие вопросы теста (демография, базовый тест, уточнения) не должны ждать,
+# пока генерируются тяжелые отчеты с рекомендациями. Планировщик ограничивает
+# число одновременных вызовов на класс приоритета, соблюдает квоту провайдера
+# (token bucket) и при перегрузке сразу отказывает с понятным результатом "занято".
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import (
+    LLM_STAGE_PRIORITIES,
+    LLM_CLASS_CONCURRENCY,
+    LLM_CLASS_MAX_QUEUE,
+    LLM_CLASS_MAX_WAIT,
+    LLM_RATE_LIMIT_PER_SEC,
+    LLM_RATE_LIMIT_BURST
+)
+
+BUSY_MESSAGE = "Сервис сейчас перегружен. Пожалуйста, повторите ответ через несколько секунд."
+
+
+class LLMBusyError(Exception):
+    """Запрос к LLM отклонен планировщиком из-за перегрузки"""
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"LLM занята (этап {stage}): {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов по квоте провайдера"""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_take(self) -> bool:
+        """Забрать один токен, если он есть"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_token(self) -> float:
+        """Сколько секунд ждать до появления токена"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class LLMScheduler:
+    """Допуск и планирование вызовов LLM по классам приоритета"""
+
+    def __init__(
+        self,
+        stage_priorities: Optional[Dict[str, int]] = None,
+        class_concurrency: Optional[Dict[int, int]] = None,
+        class_max_queue: Optional[Dict[int, int]] = None,
+        class_max_wait: Optional[Dict[int, float]] = None,
+        rate_per_sec: float = LLM_RATE_LIMIT_PER_SEC,
+        burst: int = LLM_RATE_LIMIT_BURST
+    ):
+        self.stage_priorities = stage_priorities or LLM_STAGE_PRIORITIES
+        self.class_concurrency = class_concurrency or LLM_CLASS_CONCURRENCY
+        self.class_max_queue = class_max_queue or LLM_CLASS_MAX_QUEUE
+        self.class_max_wait = class_max_wait or LLM_CLASS_MAX_WAIT
+        self.bucket = TokenBucket(rate_per_sec, burst)
+
+        self._cond = threading.Condition()
+        classes = sorted(set(self.stage_priorities.values()))
+        self._running = {c: 0 for c in classes}
+        self._waiting = {c: 0 for c in classes}
+        self._stats = {
+            c: {"admitted": 0, "shed": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for c in classes
+        }
+
+    def _priority_for(self, stage: str) -> int:
+        # Неизвестные этапы считаем самыми низкоприоритетными
+        return self.stage_priorities.get(stage, max(self._running))
+
+    def _higher_class_waiting(self, priority: int) -> bool:
+        # Более важный класс ждет и сам может быть допущен — уступаем ему
+        return any(
+            self._waiting[c] and self._running[c] < self.class_concurrency.get(c, 1)
+            for c in self._waiting if c < priority
+        )
+
+    def _acquire(self, stage: str) -> int:
+        priority = self._priority_for(stage)
+        limit = self.class_concurrency.get(priority, 1)
+        max_wait = self.class_max_wait.get(priority, 0.0)
+
+        with self._cond:
+            if self._waiting[priority] >= self.class_max_queue.get(priority, 0):
+                self._stats[priority]["shed"] += 1
+                raise LLMBusyError(stage, "очередь переполнена")
+
+            started = time.monotonic()
+            deadline = started + max_wait
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    if (self._running[priority] < limit
+                            and not self._higher_class_waiting(priority)
+                            and self.bucket.try_take()):
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats[priority]["shed"] += 1
+                        raise LLMBusyError(stage, "превышено время ожидания")
+                    # Просыпаемся либо по освобождению слота, либо к появлению токена
+                    timeout = remaining
+                    if self._running[priority] < limit:
+                        timeout = min(timeout, max(self.bucket.time_until_token(), 0.001))
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting[priority] -= 1
+
+            waited = time.monotonic() - started
+            stats = self._stats[priority]
+            stats["admitted"] += 1
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+            self._running[priority] += 1
+            return priority
+
+    def _release(self, priority: int):
+        with self._cond:
+            self._running[priority] -= 1
+            self._cond.notify_all()
+
+    def submit(self, stage: str, func: Callable, *args, **kwargs):
+        """Выполнить вызов LLM с учетом приоритета этапа
+
+        Raises:
+            LLMBusyError: если запрос отклонен из-за перегрузки
+        """
+        priority = self._acquire(stage)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._release(priority)
+
+    def max_in_flight(self) -> int:
+        """Сколько вызовов планировщик может держать одновременно (выполняются + ждут),
+        прежде чем начнет отказывать"""
+        return sum(self.class_concurrency.get(c, 1) + self.class_max_queue.get(c, 0)
+                   for c in self._running)
+
+    def get_stats(self) -> Dict:
+        """Получить статистику очередей по классам приоритета"""
+        with self._cond:
+            result = {}
+            for c, stats in self._stats.items():
+                admitted = stats["admitted"]
+                result[c] = {
+                    "running": self._running[c],
+                    "waiting": self._waiting[c],
+                    "admitted": admitted,
+                    "shed": stats["shed"],
+                    "avg_wait": stats["wait_total"] / admitted if admitted else 0.0,
+                    "max_wait": stats["wait_max"]
+                }
+            return result
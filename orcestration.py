@@ -1,5 +1,6 @@
 # Условный оркестратор
 
+import uuid
 from typing import Dict, Tuple
 from holland_system_prompt import SYSTEM_PROMPT
 from holland_user_prompt import (
@@ -11,15 +12,31 @@ from holland_user_prompt import (
 from recomendation_prompt import generate_recommendation_prompt
 from professions_list import format_professions_for_prompt, get_professions_for_types
 from answer_parsing import parse_demographics_response, parse_answer_score
+from holland_session import HollandTestSession
+from llm_scheduler import LLMBusyError, BUSY_MESSAGE
+from profession_matcher import validate_recommendations
+from profession_search import search_professions
+from config import RECOMMENDATION_VALIDATION_MODE
 
 class CARAOrchestrator:
     # Инициализация оркестратора
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, scheduler=None, session=None, memory=None, session_id=None):
         self.llm = llm_client
-        #self.session = HollandTestSession() -- условный пайплайн тестовой сессии
+        self.session_id = session_id or uuid.uuid4().hex
+        # Общий планировщик вызовов LLM (LLMScheduler), если сервис под нагрузкой
+        self.scheduler = scheduler
+        self.session = session or HollandTestSession()
         self.current_prompt = None  
         self.last_question = None
+        # Тип, по которому задан последний вопрос базового теста
+        self.current_type = None
         self.recommendation_mode = False
+        # Результат проверки последних рекомендаций по списку профессий
+        self.last_recommendation_check = None
+        # Учет памяти сессии (SessionMemoryAccountant), если задан
+        self.memory = memory
+        if self.memory is not None:
+            self.memory.register(self)
         
     def initialize_session(self) -> str:
         """Инициализировать сессию и получить первое сообщение"""
@@ -30,28 +47,71 @@ class CARAOrchestrator:
         self.current_prompt = generate_demographics_prompt()
         
         # Получаем ответ от LLM
-        response = self.llm.generate_response(self.current_prompt)
+        try:
+            response = self._ask_llm(self.current_prompt, "demographics")
+        except LLMBusyError:
+            return BUSY_MESSAGE
         self.last_question = response
+        self._enforce_memory()
         
         return response
     
+    def _ask_llm(self, prompt: str, stage: str) -> str:
+        """Отправить промпт в LLM через планировщик (если он задан)"""
+        if self.scheduler is None:
+            return self.llm.generate_response(prompt)
+        return self.scheduler.submit(stage, self.llm.generate_response, prompt)
+    
     def process_user_response(self, user_response: str) -> Tuple[str, Dict]:
         """
         Обработать ответ пользователя
         Returns:
             tuple: (следующий_вопрос, информация_о_состоянии)
         """
-        state_info = {}
+        if self.memory is not None:
+            # Слишком длинные ответы не передаем в разбор целиком
+            user_response = self.memory.limit_answer(user_response)
         
-        if self.session.stage == "demographics":
-            return self._process_demographics_response(user_response, state_info)
-        elif self.session.stage == "basic_test":
-            return self._process_basic_test_response(user_response, state_info)
-        elif self.session.stage == "clarification":
-            return self._process_clarification_response(user_response, state_info)
+        result = self._dispatch_user_response(user_response)
+        self._enforce_memory()
+        return result
+    
+    def _dispatch_user_response(self, user_response: str) -> Tuple[str, Dict]:
+        """Передать ответ обработчику текущего этапа"""
+        state_info = {}
+        # Состояние до разбора ответа: если вызов LLM отклонен, ответ не должен
+        # остаться примененным, иначе повтор ответа засчитается второй раз
+        snapshot = self._snapshot_state()
+        
+        try:
+            if self.session.stage == "demographics":
+                return self._process_demographics_response(user_response, state_info)
+            elif self.session.stage == "basic_test":
+                return self._process_basic_test_response(user_response, state_info)
+            elif self.session.stage == "clarification":
+                return self._process_clarification_response(user_response, state_info)
+            elif self.session.stage == "completed":
+                return self._completed_response()
+        except LLMBusyError as e:
+            # Планировщик отказал из-за перегрузки — откатываем сессию и сообщаем "занято"
+            self._restore_state(snapshot)
+            return BUSY_MESSAGE, {"stage": self.session.stage, "busy": True, "reason": e.reason}
         
         return "Произошла ошибка обработки ответа.", {}
     
+    def _snapshot_state(self) -> Dict:
+        """Снимок изменяемого состояния сессии (записи истории не меняются при разборе)"""
+        session = vars(self.session).copy()
+        session["demographics"] = dict(self.session.demographics)
+        session["history"] = list(self.session.history)
+        session["scores"] = dict(self.session.scores)
+        return {"session": session, "current_type": self.current_type}
+    
+    def _restore_state(self, snapshot: Dict):
+        """Вернуть состояние сессии к снимку"""
+        vars(self.session).update(snapshot["session"])
+        self.current_type = snapshot["current_type"]
+    
     def _process_demographics_response(self, user_response: str, state_info: Dict) -> Tuple[str, Dict]:
         """Обработать ответ на демографические вопросы"""
         age, gender, education = parse_demographics_response(user_response)
@@ -73,8 +133,9 @@ class CARAOrchestrator:
                     history_summary=history_summary
                 )
                 
-                response = self.llm.generate_response(self.current_prompt)
+                response = self._ask_llm(self.current_prompt, "basic_test")
                 self.last_question = response
+                self.current_type = next_type
                 
                 state_info = {
                     "stage": "basic_test",
@@ -93,10 +154,7 @@ class CARAOrchestrator:
         score = parse_answer_score(user_response)
         
         # Определяем текущий тип (последний из запрошенных)
-        if self.session.history:
-            current_type = self.session.history[-1]["type"]
-        else:
-            current_type = "R"
+        current_type = self.current_type or "R"
         
         # Добавляем ответ в историю
         self.session.add_answer(
@@ -120,8 +178,9 @@ class CARAOrchestrator:
                 history_summary=history_summary
             )
             
-            response = self.llm.generate_response(self.current_prompt)
+            response = self._ask_llm(self.current_prompt, "basic_test")
             self.last_question = response
+            self.current_type = next_type
             
             state_info = {
                 "stage": "basic_test",
@@ -131,34 +190,43 @@ class CARAOrchestrator:
             }
             return response, state_info
         else:
-            # Базовый тест завершен, переходим к уточнениям
+            # Базовый тест завершен, переходим к уточнениям (если они предусмотрены)
+            if not self.session.should_ask_clarification():
+                return self._complete_test()
             self.session.stage = "clarification"
             return self._generate_first_clarification_question(state_info)
     
     def _process_clarification_response(self, user_response: str, state_info: Dict) -> Tuple[str, Dict]:
-        # Для уточняющих вопросов можно обновлять баллы или просто собирать информацию
-        self.session.increment_clarification_count()
+        # Ответы на уточняющие вопросы пока не меняют баллы, только продлевают диалог
         # Проверяем, нужно ли задавать еще уточняющие вопросы
         if self.session.should_ask_clarification():
             return self._generate_clarification_question(state_info)
-        else:
-            # Тест завершен
-            final_profile = self.session.get_initial_profile()
-            completion_message = f"""Тестирование завершено!
+        return self._complete_test()
+    
+    def _complete_test(self) -> Tuple[str, Dict]:
+        """Завершить тест и сообщить итоговый профиль"""
+        self.session.stage = "completed"
+        final_profile = self.session.get_initial_profile()
+        completion_message = f"""Тестирование завершено!
 
 Ваш профиль по методике Холланда:
 {final_profile}
 
 На основе этого профиля система сформирует персональные рекомендации по профессиям."""
 
-            state_info = {
-                "stage": "completed",
-                "final_scores": self.session.scores,
-                "final_profile": final_profile,
-                "total_questions": self.session.questions_asked + self.session.clarification_questions_asked
-            }
-            
-            return completion_message, state_info
+        state_info = {
+            "stage": "completed",
+            "final_scores": self.session.scores,
+            "final_profile": final_profile,
+            "total_questions": self.session.questions_asked + self.session.clarification_questions_asked
+        }
+        
+        return completion_message, state_info
+    
+    def _completed_response(self) -> Tuple[str, Dict]:
+        """Ответ на сообщения после завершения теста"""
+        message = "Тестирование уже завершено. Запросите отчет, чтобы получить рекомендации по профессиям."
+        return message, {"stage": "completed", "final_scores": self.session.scores}
     
     def _generate_first_clarification_question(self, state_info: Dict) -> Tuple[str, Dict]:
         """Сгенерировать первый уточняющий вопрос"""
@@ -174,7 +242,7 @@ class CARAOrchestrator:
             analysis=analysis
         )
         
-        response = self.llm.generate_response(self.current_prompt)
+        response = self._ask_llm(self.current_prompt, "clarification")
         self.last_question = response
         self.session.increment_clarification_count()
         
@@ -200,16 +268,22 @@ class CARAOrchestrator:
             analysis=analysis
         )
         
-        response = self.llm.generate_response(self.current_prompt)
+        response = self._ask_llm(self.current_prompt, "clarification")
         self.last_question = response
+        self.session.increment_clarification_count()
         
         state_info = {
             "stage": "clarification",
-            "clarification_question": self.session.clarification_questions_asked + 1,
+            "clarification_question": self.session.clarification_questions_asked,
             "scores": self.session.scores
         }
         return response, state_info
     
+    def _enforce_memory(self):
+        """Привести память сессии к лимитам"""
+        if self.memory is not None:
+            self.memory.enforce(self)
+    
     def get_session_summary(self) -> Dict:
         """Получить сводку по текущей сессии"""
         return self.session.get_current_progress()
@@ -220,23 +294,19 @@ class CARAOrchestrator:
         
         Returns:
             str: рекомендации профессий
-        """
-        # Определяем наиболее выраженные типы
-        sorted_scores = sorted(self.session.scores.items(), key=lambda x: x[1], reverse=True)
         
-        # Выбираем типы с положительными баллами (>= 0)
-        recommended_types = [t for t, s in sorted_scores if s >= 0]
-        
-        # Если все баллы отрицательные, берем наименее отрицательные
-        if not recommended_types:
-            recommended_types = [sorted_scores[0][0]]
-        
-        # Ограничиваем 2-3 наиболее выраженными типами
-        if len(recommended_types) > 3:
-            recommended_types = recommended_types[:3]
+        Raises:
+            LLMBusyError: если планировщик отклонил запрос из-за перегрузки
+        """
+        # 2-3 наиболее выраженных типа (общая логика с пакетным пересчетом)
+        recommended_types = self.session.get_recommended_types()
         
         # Получаем профессии для рекомендованных типов
-        professions_by_type = get_professions_for_types(recommended_types, limit_per_type=10)
+        professions_by_type = get_professions_for_types(
+            recommended_types,
+            limit_per_type=10,
+            demographics=self.session.demographics
+        )
         professions_text = format_professions_for_prompt(professions_by_type)
         
         # Генерируем промпт для рекомендаций
@@ -247,7 +317,16 @@ class CARAOrchestrator:
         )
         
         # Получаем рекомендации от LLM
-        recommendations = self.llm.generate_response(recommendation_prompt)
+        recommendations = self._ask_llm(recommendation_prompt, "recommendations")
+        
+        # Проверяем, что модель не вышла за пределы переданного списка профессий
+        self.last_recommendation_check = validate_recommendations(
+            recommendations,
+            professions_by_type,
+            mode=RECOMMENDATION_VALIDATION_MODE
+        )
+        recommendations = self.last_recommendation_check["text"]
+        self._enforce_memory()
         
         # Добавляем заголовок
         formatted_recommendations = f"""🎯 РЕКОМЕНДАЦИИ ПРОФЕССИЙ НА ОСНОВЕ ВАШЕГО ПРОФИЛЯ
@@ -277,12 +356,29 @@ class CARAOrchestrator:
             "session_summary": self.session.get_current_progress(),
             "profile_analysis": self._analyze_profile(),
             "recommendations": recommendations,
+            "recommended_professions": self.last_recommendation_check["matched"],
+            "unknown_professions": self.last_recommendation_check["unknown"],
             "top_types": self._get_top_types(3),
             "career_paths": self._suggest_career_paths()
         }
         
         return report
     
+    def check_desired_profession(self, query: str, k: int = 5) -> Dict:
+        """
+        Найти желаемую профессию пользователя и сопоставить ее с профилем
+        
+        Returns:
+            Dict: найденные профессии с типами Холланда и баллами пользователя по этим типам
+                  (profile_fit равен None, если типы профессии неизвестны)
+        """
+        matches = search_professions(query, k)
+        for match in matches:
+            type_scores = {t: self.session.scores.get(t, 0) for t in match["types"]}
+            match["profile_scores"] = type_scores
+            match["profile_fit"] = max(type_scores.values()) if type_scores else None
+        return {"query": query, "matches": matches}
+    
     def _analyze_profile(self) -> str:
         """Проанализировать профиль пользователя"""
         scores = self.session.scores
@@ -0,0 +1,286 @@
+# Проверка рекомендаций LLM по списку допустимых профессий.
+# Промпт запрещает модели придумывать профессии, но ответ никто не проверял.
+# Здесь ответ сканируется за один проход автоматом Ахо-Корасик, построенным по
+# справочнику профессий и их синонимам. Упоминания профессий, которых не было
+# в переданном модели списке, помечаются или вырезаются.
+#
+# Ограничение: автомат находит только профессии из справочника. Полностью
+# выдуманное название, которого нет в professions.txt, так не обнаружить.
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from professions_list import load_professions_catalog
+
+UNKNOWN_MARK = " [нет в списке]"
+
+# Однословные названия из справочника, которые в обычной речи встречаются как
+# общие слова ("ведущий исследователь", "эксперт в области", "военный врач").
+# Если их нет в переданном модели списке, не считаем их лишними профессиями.
+GENERIC_PROFESSION_WORDS = frozenset({
+    "ведущий", "мастер", "эксперт", "оператор", "врач", "политик", "критик", "спец",
+    "специалист", "консультант", "военный", "пожарный", "рулевой", "инженер", "техник",
+    "технолог", "аналитик", "менеджер", "директор", "руководитель", "заведующий",
+    "управляющий", "администратор", "агент", "разработчик", "конструктор", "строитель",
+    "продавец", "предприниматель", "коммерсант", "коллектор", "креатор", "спортсмен",
+    "педагог", "преподаватель", "учитель", "механик", "инспектор", "контролер",
+    "контроллер", "проводник", "охотник", "рыбак", "поэт", "писатель", "артист",
+    "художник", "музыкант", "судья", "тренер"
+})
+
+
+def _normalize_char(ch: str) -> str:
+    # Нормализация строго посимвольная, чтобы позиции в тексте не сдвигались
+    if ch == "ё" or ch == "Ё":
+        return "е"
+    if ch == "\xa0":
+        return " "
+    low = ch.lower()
+    return low if len(low) == 1 else ch
+
+
+@lru_cache(maxsize=8192)
+def normalize_name(name: str) -> str:
+    """Нормализовать название профессии для сравнения"""
+    return "".join(_normalize_char(ch) for ch in name.strip())
+
+
+def _is_word_char(ch: str) -> bool:
+    # Дефис внутри составных названий ("Инженер-механик") — часть слова
+    return ch.isalnum() or ch == "-"
+
+
+class ProfessionAutomaton:
+    """Автомат Ахо-Корасик по названиям профессий и синонимам"""
+
+    def __init__(self, catalog: Dict[str, list]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.names = []       # id шаблона -> каноническое название
+        self.lengths = []     # id шаблона -> длина шаблона
+        self.generic = []     # id шаблона -> общее слово (см. GENERIC_PROFESSION_WORDS)
+
+        patterns = {}
+        # Сначала канонические названия, чтобы синоним не перекрыл одноименную профессию
+        for name in catalog:
+            patterns.setdefault(normalize_name(name), name)
+        for name, aliases in catalog.items():
+            for alias in aliases:
+                patterns.setdefault(normalize_name(alias), name)
+
+        for pattern, name in patterns.items():
+            if pattern:
+                self._add(pattern, name)
+        self.max_length = max(self.lengths) if self.lengths else 0
+        self._build()
+
+    def _add(self, pattern: str, name: str):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(len(self.names))
+        self.names.append(name)
+        self.lengths.append(len(pattern))
+        self.generic.append(pattern in GENERIC_PROFESSION_WORDS)
+
+    def _build(self):
+        queue = deque()
+        for nxt in self.goto[0].values():
+            self.fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                # Выходы суффиксных состояний наследуем сразу, чтобы не ходить по fail при поиске
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def step(self, node: int, ch: str) -> int:
+        while node and ch not in self.goto[node]:
+            node = self.fail[node]
+        return self.goto[node].get(ch, 0)
+
+
+@lru_cache(maxsize=1)
+def get_profession_automaton() -> ProfessionAutomaton:
+    """Получить автомат по справочнику профессий (строится один раз)"""
+    return ProfessionAutomaton(load_professions_catalog())
+
+
+class ProfessionStreamScanner:
+    """Потоковый поиск упоминаний профессий в ответе LLM
+
+    Текст можно подавать кусками по мере генерации: feed() возвращает
+    упоминания, которые уже не могут измениться, finish() — оставшиеся.
+    Из пересекающихся совпадений выбирается самое левое и самое длинное.
+    """
+
+    def __init__(self, allowed_professions: Optional[list] = None,
+                 automaton: Optional[ProfessionAutomaton] = None):
+        self.automaton = automaton or get_profession_automaton()
+        self.allowed = {normalize_name(p) for p in (allowed_professions or [])}
+        self.node = 0
+        self.pos = 0
+        self.text = []        # исходные символы (для текста упоминаний)
+        self.awaiting = []    # совпадения, ждущие проверки границы справа
+        self.candidates = []  # подтвержденные, но еще не окончательные совпадения
+        self.last_end = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Обработать очередной кусок текста"""
+        automaton = self.automaton
+        mentions = []
+        for ch in chunk:
+            if self.awaiting:
+                if not _is_word_char(ch):
+                    self.candidates.extend(c for c in self.awaiting if c[0] >= self.last_end)
+                self.awaiting = []
+
+            self.text.append(ch)
+            self.node = automaton.step(self.node, _normalize_char(ch))
+            end = self.pos + 1
+            for pattern_id in automaton.out[self.node]:
+                start = end - automaton.lengths[pattern_id]
+                if start == 0 or not _is_word_char(self.text[start - 1]):
+                    self.awaiting.append((start, end, pattern_id))
+            self.pos = end
+            if self.candidates:
+                mentions.extend(self._finalize(final=False))
+        return mentions
+
+    def finish(self) -> List[Dict]:
+        """Завершить поток и вернуть оставшиеся упоминания"""
+        self.candidates.extend(c for c in self.awaiting if c[0] >= self.last_end)
+        self.awaiting = []
+        return self._finalize(final=True)
+
+    def _finalize(self, final: bool) -> List[Dict]:
+        mentions = []
+        horizon = self.pos - self.automaton.max_length
+        while self.candidates:
+            start = min(c[0] for c in self.candidates)
+            # Пока могут появиться более длинные совпадения с тем же началом — ждем
+            if not final and start >= horizon:
+                break
+            best = max((c for c in self.candidates if c[0] == start), key=lambda c: c[1])
+            self.last_end = best[1]
+            self.candidates = [c for c in self.candidates if c[0] >= self.last_end]
+            mentions.append(self._mention(*best))
+        return mentions
+
+    def _mention(self, start: int, end: int, pattern_id: int) -> Dict:
+        name = self.automaton.names[pattern_id]
+        return {
+            "name": name,
+            "text": "".join(self.text[start:end]),
+            "start": start,
+            "end": end,
+            "allowed": normalize_name(name) in self.allowed,
+            "generic": self.automaton.generic[pattern_id]
+        }
+
+
+def _allowed_from_professions(professions_by_type: dict) -> list:
+    return [p for professions in professions_by_type.values() for p in professions]
+
+
+# Маркер пункта списка перед профессией, возможно с выделением: "- ", "2) ", "* **"
+_BULLET_PREFIX = re.compile(r"^\s*(?:[-•*–—]|\d+[.)])\s*(?:\*\*|__)?$")
+
+
+# Разделители между профессиями в перечислении
+_LIST_JOINERS = (", ", " и ", " или ")
+
+
+def _strip_unknown(text: str, mentions: List[Dict]) -> str:
+    # Сначала решаем, что делать с каждой лишней профессией (по исходным позициям),
+    # затем применяем правки с конца, чтобы позиции более ранних оставались верными.
+    # Если чисто вырезать упоминание нельзя, оно помечается, как в режиме "flag"
+    edits = []  # (начало, конец, замена)
+    removed = set()
+    for index, mention in enumerate(mentions):
+        if mention["allowed"] or mention["generic"]:
+            continue
+        start, end = mention["start"], mention["end"]
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", end)
+        line_end = len(text) if line_end == -1 else line_end
+        prev = mentions[index - 1] if index > 0 else None
+        nxt = mentions[index + 1] if index + 1 < len(mentions) else None
+        alone_on_line = ((prev is None or prev["end"] <= line_start) and
+                         (nxt is None or nxt["start"] > line_end))
+
+        if alone_on_line and _BULLET_PREFIX.match(text[line_start:start]):
+            # Пункт списка только с этой профессией: убираем пункт целиком
+            edits.append((line_start, min(line_end + 1, len(text)), ""))
+        elif nxt is not None and text[end:nxt["start"]] in _LIST_JOINERS:
+            # "Юрист, Электрик" -> "Электрик"
+            edits.append((start, nxt["start"], ""))
+        elif (prev is not None and index - 1 not in removed
+              and text[prev["end"]:start] in _LIST_JOINERS):
+            # "Архитектор и Физик-ядерщик" -> "Архитектор"
+            edits.append((prev["end"], end, ""))
+        else:
+            edits.append((end, end, UNKNOWN_MARK))
+            continue
+        removed.add(index)
+
+    for start, end, replacement in reversed(edits):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+def validate_recommendations(text: str, professions_by_type: dict, mode: str = "flag") -> Dict:
+    """Проверить ответ LLM с рекомендациями по списку допустимых профессий
+
+    Args:
+        text: ответ LLM
+        professions_by_type: профессии, переданные модели в промпте
+        mode: "flag" — пометить лишние профессии, "strip" — вырезать их
+              (пункт списка только с лишней профессией убирается целиком;
+              если вырезать упоминание без обрывков текста нельзя, оно помечается)
+
+    Returns:
+        dict: {"text": обработанный текст, "matched": [допустимые профессии],
+               "unknown": [профессии не из списка], "mentions": [все упоминания]}
+    """
+    if mode not in ("flag", "strip"):
+        raise ValueError(f"Неизвестный режим проверки: {mode}")
+
+    scanner = ProfessionStreamScanner(_allowed_from_professions(professions_by_type))
+    mentions = scanner.feed(text) + scanner.finish()
+    # Общие слова не из списка — скорее обычная речь, чем рекомендованная профессия
+    unknown_mentions = [m for m in mentions if not m["allowed"] and not m["generic"]]
+
+    if mode == "strip":
+        result_text = _strip_unknown(text, mentions)
+    else:
+        parts = []
+        last = 0
+        for mention in unknown_mentions:
+            parts.append(text[last:mention["end"]])
+            parts.append(UNKNOWN_MARK)
+            last = mention["end"]
+        parts.append(text[last:])
+        result_text = "".join(parts)
+
+    return {
+        "text": result_text,
+        "matched": list(dict.fromkeys(m["name"] for m in mentions if m["allowed"])),
+        "unknown": list(dict.fromkeys(m["name"] for m in unknown_mentions)),
+        "mentions": mentions
+    }
@@ -0,0 +1,232 @@
+# Поиск и автодополнение по справочнику профессий.
+# Индекс строится один раз: префиксное дерево по началам слов для автодополнения
+# и триграммный индекс для поиска с опечатками. Кириллица, латиница и смешанные
+# названия приводятся к одной латинской транслитерации, поэтому "веб дизайнер",
+# "web-дизайнер" и "dizainer" находят одну и ту же профессию.
+# Типы Холланда есть только у профессий из PROFESSIONS_LIST; для остальных они
+# выводятся по главному слову названия или по похожей профессии из списка
+# (поле types_source в результате), а если вывести не удалось — types пустой.
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List
+
+from professions_list import PROFESSIONS_LIST, load_professions_catalog
+from profession_matcher import GENERIC_PROFESSION_WORDS, normalize_name
+
+# Транслитерация кириллицы в латиницу (упрощенная, однозначная)
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya"
+})
+_SEPARATORS = re.compile(r"[^\w&]+")
+_FILLER_WORDS = frozenset({"по", "и", "в", "на", "с", "для"})
+# Сколько профессий хранить в узле префиксного дерева
+MAX_AUTOCOMPLETE_RESULTS = 50
+# Минимальная похожесть (коэффициент Дайса по триграммам) для нечеткого совпадения
+MIN_FUZZY_SCORE = 0.3
+# Минимальная похожесть для переноса типов с похожей профессии из списка
+MIN_TYPE_SIMILARITY = 0.5
+
+
+def search_key(text: str) -> str:
+    """Привести название к ключу поиска: нижний регистр, латиница, слова через пробел"""
+    words = _SEPARATORS.split(normalize_name(text).translate(_TRANSLIT))
+    return " ".join(word for word in words if word)
+
+
+def _specific_key(name: str) -> str:
+    """Ключ поиска без общих слов ("специалист по", "инженер"), чтобы похожесть
+    определялась специализацией, а не шаблоном названия"""
+    words = [word for word in re.findall(r"\w+", normalize_name(name))
+             if word not in GENERIC_PROFESSION_WORDS and word not in _FILLER_WORDS]
+    return search_key(" ".join(words)) if words else search_key(name)
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []
+
+
+class ProfessionSearchIndex:
+    """Индекс для автодополнения и нечеткого поиска профессий"""
+
+    def __init__(self, catalog: Dict[str, list]):
+        types_by_name = defaultdict(list)
+        for type_code, professions in PROFESSIONS_LIST.items():
+            for prof in professions:
+                types_by_name[normalize_name(prof)].append(type_code)
+
+        self.names = []        # id профессии -> название
+        self.types = []        # id профессии -> типы Холланда
+        # id профессии -> откуда взяты типы: "list" (PROFESSIONS_LIST), "head" (главное
+        # слово названия), "similar" (похожая профессия из списка) или None (неизвестны)
+        self.types_source = []
+        self.keys = []         # id ключа -> (id профессии, ключ поиска, исходный текст)
+        self.root = _TrieNode()
+        self.postings = defaultdict(list)   # триграмма -> [id ключа]
+        self.key_trigram_counts = []
+
+        for name, aliases in catalog.items():
+            entry_id = len(self.names)
+            self.names.append(name)
+            entry_types = []
+            for text in [name] + aliases:
+                for type_code in types_by_name.get(normalize_name(text), []):
+                    if type_code not in entry_types:
+                        entry_types.append(type_code)
+                self._add_key(entry_id, text)
+            self.types.append(entry_types)
+            self.types_source.append("list" if entry_types else None)
+
+        self._infer_types(types_by_name)
+        self._finalize_trie()
+
+    def _add_key(self, entry_id: int, text: str):
+        key = search_key(text)
+        if not key:
+            return
+        key_id = len(self.keys)
+        self.keys.append((entry_id, key, text))
+
+        trigrams = _trigrams(key)
+        self.key_trigram_counts.append(len(trigrams))
+        for trigram in trigrams:
+            self.postings[trigram].append(key_id)
+
+        # В дерево добавляем каждый суффикс, начинающийся с нового слова,
+        # чтобы "дизайн" находил и "Графический дизайнер"
+        starts = [0] + [m.end() for m in re.finditer(" ", key)]
+        for start in starts:
+            node = self.root
+            for ch in key[start:]:
+                node = node.children.setdefault(ch, _TrieNode())
+                node.entries.append((start, key_id))
+
+    def _infer_types(self, types_by_name: Dict[str, list]):
+        # Большинства профессий справочника нет в PROFESSIONS_LIST. Их типы берем
+        # у главного слова названия ("Юрист-международник" -> "Юрист"), а если
+        # такого нет — у самой похожей по триграммам профессии из списка
+        # Первые слова многословных названий из списка: "Программист 1С" -> "программист"
+        types_by_head = defaultdict(Counter)
+        for name, name_types in types_by_name.items():
+            words = re.findall(r"\w+", name)
+            if len(words) > 1 and words[0] not in GENERIC_PROFESSION_WORDS:
+                types_by_head[words[0]].update(name_types)
+        listed_names = list(types_by_name)
+        listed_postings = defaultdict(list)
+        listed_counts = []
+        for listed_id, name in enumerate(listed_names):
+            trigrams = _trigrams(_specific_key(name))
+            listed_counts.append(len(trigrams))
+            for trigram in trigrams:
+                listed_postings[trigram].append(listed_id)
+
+        for entry_id, name in enumerate(self.names):
+            if self.types[entry_id]:
+                continue
+            words = re.findall(r"\w+", normalize_name(name))
+            head_types = next((types_by_name[word] for word in words if word in types_by_name), None)
+            if head_types is None and words and words[0] in types_by_head:
+                head_types = [t for t, _ in types_by_head[words[0]].most_common()]
+            if head_types:
+                self.types[entry_id] = list(head_types)
+                self.types_source[entry_id] = "head"
+            else:
+                trigrams = _trigrams(_specific_key(name))
+                common = Counter(chain.from_iterable(listed_postings.get(t, ()) for t in trigrams))
+                best_score, best_id = 0.0, None
+                for listed_id, count in common.items():
+                    score = 2 * count / (len(trigrams) + listed_counts[listed_id])
+                    if score > best_score:
+                        best_score, best_id = score, listed_id
+                if best_score >= MIN_TYPE_SIMILARITY:
+                    self.types[entry_id] = list(types_by_name[listed_names[best_id]])
+                    self.types_source[entry_id] = "similar"
+
+    def _finalize_trie(self):
+        # В каждом узле оставляем профессии один раз, в порядке: совпадение с начала
+        # названия, затем более короткие названия
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            best = {}
+            for start, key_id in node.entries:
+                entry_id = self.keys[key_id][0]
+                rank = (start > 0, len(self.keys[key_id][1]), key_id)
+                if entry_id not in best or rank < best[entry_id][0]:
+                    best[entry_id] = (rank, key_id)
+            ranked = sorted(best.values())[:MAX_AUTOCOMPLETE_RESULTS]
+            node.entries = [(key_id, rank[0]) for rank, key_id in ranked]
+            stack.extend(node.children.values())
+
+    def _result(self, key_id: int, score: float) -> Dict:
+        entry_id, _, text = self.keys[key_id]
+        return {"name": self.names[entry_id], "matched": text,
+                "types": self.types[entry_id], "types_source": self.types_source[entry_id],
+                "score": round(score, 3)}
+
+    def autocomplete(self, prefix: str, k: int = 10) -> List[Dict]:
+        """Профессии, название которых (или одно из слов) начинается с prefix"""
+        node = self.root
+        for ch in search_key(prefix):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [self._result(key_id, 0.9 if word_match else 1.0)
+                for key_id, word_match in node.entries[:k]]
+
+    def fuzzy(self, query: str, k: int = 10, min_score: float = MIN_FUZZY_SCORE) -> List[Dict]:
+        """Нечеткий поиск по триграммам (устойчив к опечаткам)"""
+        query_trigrams = _trigrams(search_key(query))
+        if not query_trigrams:
+            return []
+        # Подсчет общих триграмм одним проходом по спискам вхождений
+        common = Counter(chain.from_iterable(self.postings.get(t, ()) for t in query_trigrams))
+
+        best = {}
+        total = len(query_trigrams)
+        for key_id, count in common.items():
+            score = 2 * count / (total + self.key_trigram_counts[key_id])
+            if score < min_score:
+                continue
+            entry_id = self.keys[key_id][0]
+            if entry_id not in best or score > best[entry_id][0]:
+                best[entry_id] = (score, key_id)
+        top = sorted(best.values(), key=lambda item: (-item[0], len(self.keys[item[1]][1])))[:k]
+        return [self._result(key_id, score) for score, key_id in top]
+
+    def search(self, query: str, k: int = 10) -> List[Dict]:
+        """Поиск профессии: сначала совпадения по началу, затем нечеткие"""
+        results = self.autocomplete(query, k)
+        if len(results) < k:
+            seen = {item["name"] for item in results}
+            for item in self.fuzzy(query, k):
+                if item["name"] not in seen and len(results) < k:
+                    results.append(item)
+        return results
+
+
+@lru_cache(maxsize=1)
+def get_search_index() -> ProfessionSearchIndex:
+    """Получить поисковый индекс по справочнику профессий
+
+    Строится один раз; сервер вызывает эту функцию при старте.
+    """
+    return ProfessionSearchIndex(load_professions_catalog())
+
+
+def search_professions(query: str, k: int = 10) -> List[Dict]:
+    """Найти top-k профессий по запросу вместе с их типами Холланда"""
+    return get_search_index().search(query, k)
@@ -1,3 +1,13 @@
+import os
+import re
+from functools import lru_cache
+
+from config import EDUCATION_RANK, AGE_GROUPS, EDUCATION_REACH_BY_AGE_GROUP, HOLLAND_TYPES_ORDER
+from recomendation_prompt import get_age_group
+
+# Полный справочник профессий (по одной на строку)
+PROFESSIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "professions.txt")
+
 PROFESSIONS_LIST =  {
     "R": [
         "3D-моделлер", "Автоинструктор", "Автомеханик", "Автослесарь", "Авиационный инженер",
@@ -125,32 +135,296 @@ PROFESSIONS_LIST =  {
     ]
 }
 
-def get_professions_for_types(types: list, limit_per_type: int = 7) -> dict:
-    """Получить профессии для указанных типов"""
+# Минимальное образование по ключевым словам в названии (первое совпадение).
+# Более специфичные ключи стоят раньше: "ветеринарный фельдшер" раньше "ветеринар"
+PROFESSION_EDUCATION_KEYWORDS = [
+    ("фельдшер", "Средне-специальное"),
+    ("техник", "Средне-специальное"),
+    ("медсестра", "Средне-специальное"),
+    ("медицинская сестра", "Средне-специальное"),
+    ("инженер", "Высшее"),
+    ("врач", "Высшее"),
+    ("ветеринар", "Высшее"),
+    ("хирург", "Высшее"),
+    ("педиатр", "Высшее"),
+    ("акушер", "Высшее"),
+    ("терапевт", "Высшее"),
+    ("психолог", "Высшее"),
+    ("педагог", "Высшее"),
+    ("учитель", "Высшее"),
+    ("преподаватель", "Высшее"),
+    ("логопед", "Высшее"),
+    ("дефектолог", "Высшее"),
+    ("архитектор", "Высшее"),
+    ("юрист", "Высшее"),
+    ("юрисконсульт", "Высшее"),
+    ("судья", "Высшее"),
+    ("нотариус", "Высшее"),
+    ("аудитор", "Высшее"),
+    ("экономист", "Высшее"),
+    ("финансист", "Высшее"),
+    ("финансовый", "Высшее"),
+    ("аналитик", "Высшее"),
+    ("директор", "Высшее"),
+    ("режиссёр", "Высшее"),
+    ("дирижёр", "Высшее"),
+    ("искусствовед", "Высшее"),
+    ("редактор", "Высшее"),
+    ("пилот", "Высшее"),
+    ("лётчик", "Высшее"),
+    ("штурман", "Высшее"),
+    ("механик", "Средне-специальное"),
+    ("электрик", "Средне-специальное"),
+    ("бухгалтер", "Средне-специальное"),
+    ("программист", "Средне-специальное"),
+    ("лаборант", "Средне-специальное"),
+    ("дизайнер", "Средне-специальное"),
+    ("повар", "Средне-специальное"),
+    ("курьер", "Среднее неоконченное"),
+    ("упаковщик", "Среднее неоконченное"),
+    ("почтальон", "Среднее неоконченное"),
+    ("официант", "Среднее неоконченное"),
+    ("продавец", "Среднее неоконченное"),
+    ("мерчендайзер", "Среднее неоконченное"),
+    ("оператор call-центра", "Среднее неоконченное"),
+    ("сиделка", "Среднее неоконченное"),
+    ("няня", "Среднее неоконченное"),
+    ("вожатый", "Среднее неоконченное"),
+    ("кладовщик", "Среднее"),
+    ("водитель", "Среднее"),
+    ("тракторист", "Среднее"),
+    ("агент", "Среднее"),
+    ("секретарь", "Среднее"),
+    ("кассир", "Среднее"),
+    ("тренер", "Среднее"),
+    ("фотограф", "Среднее"),
+    ("копирайтер", "Среднее"),
+    ("предприниматель", "Среднее"),
+    ("основатель стартапа", "Среднее")
+]
+# Если ключевое слово не найдено, уровень определяется типом профессии
+PROFESSION_EDUCATION_BY_TYPE = {
+    "R": "Средне-специальное",
+    "I": "Высшее",
+    "A": "Среднее",
+    "S": "Средне-специальное",
+    "E": "Среднее",
+    "C": "Средне-специальное"
+}
+# Профессии только для совершеннолетних (вождение, опасные работы, госслужба)
+ADULT_ONLY_KEYWORDS = [
+    "водитель", "тракторист", "крановщик", "машинист", "пилот", "лётчик", "штурман",
+    "полицейский", "пожарный", "спасатель", "шахтёр", "бурильщик", "сталевар", "каскадёр",
+    "дозиметрист", "инкассатор", "таможенник", "бармен", "охотник", "инструктор по вождению",
+    "автоинструктор"
+]
+# Руководящие позиции, на которые не выходят без опыта работы
+EXPERIENCED_ONLY_KEYWORDS = [
+    "директор", "руководитель", "управляющий", "начальник", "заведующий", "президент",
+    "сео", "судья", "нотариус", "тимлид", "шеф-повар", "прораб", "супервайзер", "инвестор",
+    "r&d менеджер"
+]
+
+# Исключения, которые ключевые слова классифицируют неверно
+# (в том числе слитные названия, где ключ не отделен: "Агроинженер", "Психотерапевт")
+PROFESSION_EDUCATION_OVERRIDES = {
+    "Акушер": "Средне-специальное",
+    "AI-тренер": "Высшее",
+    "Агроинженер": "Высшее",
+    "Психотерапевт": "Высшее",
+    "Сурдопедагог": "Высшее",
+    "Криптоаналитик": "Высшее"
+}
+
+def _keyword_words(text: str) -> str:
+    # Слова названия через пробел; части составных названий ("Инженер-механик") — отдельные слова
+    return " " + " ".join(re.findall(r"[\w&]+", text.lower())) + " "
+
+def _match_keyword(name: str, keywords: list) -> bool:
+    words = _keyword_words(name)
+    return any(_keyword_words(keyword) in words for keyword in keywords)
+
+def get_profession_min_education(name: str, type_code: str) -> str:
+    """Минимальный уровень образования для профессии"""
+    if name in PROFESSION_EDUCATION_OVERRIDES:
+        return PROFESSION_EDUCATION_OVERRIDES[name]
+    words = _keyword_words(name)
+    for keyword, education in PROFESSION_EDUCATION_KEYWORDS:
+        # Ключ совпадает только целыми словами: "терапевт" не относится к "Физиотерапевт"
+        if _keyword_words(keyword) in words:
+            return education
+    return PROFESSION_EDUCATION_BY_TYPE.get(type_code, "Среднее")
+
+def get_profession_age_groups(name: str) -> list:
+    """Возрастные группы, для которых профессия подходит"""
+    groups = [age_group for _, age_group in AGE_GROUPS]
+    if _match_keyword(name, EXPERIENCED_ONLY_KEYWORDS):
+        return groups[2:]
+    if _match_keyword(name, ADULT_ONLY_KEYWORDS):
+        return groups[1:]
+    return groups
+
+def _build_eligibility_masks() -> tuple:
+    """Собрать битовые маски по типам, уровню образования и возрастным группам
+    
+    Каждой паре (тип, профессия) соответствует свой бит в порядке PROFESSIONS_LIST,
+    поэтому перебор битов по возрастанию сохраняет исходный порядок профессий в типе.
+    """
+    entries = []
+    type_masks = {type_code: 0 for type_code in HOLLAND_TYPES_ORDER}
+    education_masks = {rank: 0 for rank in sorted(set(EDUCATION_RANK.values()))}
+    age_masks = {age_group: 0 for _, age_group in AGE_GROUPS}
+    
+    for type_code, professions in PROFESSIONS_LIST.items():
+        for prof in professions:
+            bit = 1 << len(entries)
+            entries.append(prof)
+            type_masks[type_code] = type_masks.get(type_code, 0) | bit
+            
+            min_rank = EDUCATION_RANK[get_profession_min_education(prof, type_code)]
+            for rank in education_masks:
+                if rank >= min_rank:
+                    education_masks[rank] |= bit
+            for age_group in get_profession_age_groups(prof):
+                age_masks[age_group] |= bit
+    
+    return entries, type_masks, education_masks, age_masks
+
+PROFESSION_ENTRIES, TYPE_MASKS, EDUCATION_MASKS, AGE_GROUP_MASKS = _build_eligibility_masks()
+
+def _reachable_education_rank(demographics: dict, age_group: str) -> int:
+    education = demographics.get('education', 'Среднее')
+    rank = EDUCATION_RANK.get(education, EDUCATION_RANK["Среднее"])
+    # Неоконченный уровень пользователь, скорее всего, завершит
+    if "неоконченное" in education.lower():
+        rank += 1
+    return min(rank + EDUCATION_REACH_BY_AGE_GROUP.get(age_group, 0), max(EDUCATION_MASKS))
+
+def get_eligibility_mask(demographics: dict) -> int:
+    """Маска профессий, доступных пользователю по возрасту и образованию"""
+    return get_relaxed_eligibility_masks(demographics)[0]
+
+def get_relaxed_eligibility_masks(demographics: dict) -> list:
+    """Маски доступных профессий от самой строгой к самой мягкой
+    
+    Сначала по одной ступени повышается уровень образования при фильтре по возрасту,
+    затем снимается фильтр по возрасту. Последняя маска пропускает все профессии.
+    """
+    age_group = get_age_group(demographics.get('age', 25))
+    rank = _reachable_education_rank(demographics, age_group)
+    ranks = range(rank, max(EDUCATION_MASKS) + 1)
+    return ([AGE_GROUP_MASKS[age_group] & EDUCATION_MASKS[r] for r in ranks] +
+            [EDUCATION_MASKS[r] for r in ranks])
+
+def _professions_from_mask(mask: int, limit: int) -> list:
+    professions = []
+    while mask and len(professions) < limit:
+        lowest = mask & -mask
+        professions.append(PROFESSION_ENTRIES[lowest.bit_length() - 1])
+        mask ^= lowest
+    return professions
+
+def get_professions_for_types(types: list, limit_per_type: int = 7, demographics: dict = None) -> dict:
+    """Получить профессии для указанных типов
+    
+    Если переданы демографические данные, профессии отбираются по возрасту и образованию.
+    Если по типу ничего не подходит, фильтр ослабляется по шагам
+    (см. get_relaxed_eligibility_masks) до первого непустого результата.
+    """
+    eligibility_masks = get_relaxed_eligibility_masks(demographics) if demographics else [-1]
     result = {}
     for type_code in types:
         if type_code in PROFESSIONS_LIST:
-            professions = PROFESSIONS_LIST[type_code][:limit_per_type]
-            result[type_code] = professions
+            type_mask = TYPE_MASKS[type_code]
+            mask = next((type_mask & m for m in eligibility_masks if type_mask & m), type_mask)
+            result[type_code] = _professions_from_mask(mask, limit_per_type)
     return result
 
+PROFESSION_TYPE_NAMES = {
+    "R": "РЕАЛИСТИЧЕСКИЙ (Realistic - R)",
+    "I": "ИССЛЕДОВАТЕЛЬСКИЙ (Investigative - I)", 
+    "A": "АРТИСТИЧЕСКИЙ (Artistic - A)",
+    "S": "СОЦИАЛЬНЫЙ (Social - S)",
+    "E": "ПРЕДПРИНИМАТЕЛЬСКИЙ (Enterprising - E)",
+    "C": "КОНВЕНЦИОНАЛЬНЫЙ (Conventional - C)"
+}
+
+def _format_type_block(type_code: str, professions: tuple) -> str:
+    """Блок промпта со списком профессий одного типа"""
+    type_name = PROFESSION_TYPE_NAMES.get(type_code, type_code)
+    lines = [f"{type_name}:"]
+    for prof in professions:
+        lines.append(f"   - {prof}")
+    lines.append("")
+    return "\n".join(lines)
+
+# Одни и те же наборы профессий по типу повторяются от сессии к сессии
+_format_type_block_cached = lru_cache(maxsize=1024)(_format_type_block)
+
 # Форматирование профессий для промпта
 def format_professions_for_prompt(professions_by_type: dict) -> str:
-    formatted = []
-    type_names = {
-        "R": "РЕАЛИСТИЧЕСКИЙ (Realistic - R)",
-        "I": "ИССЛЕДОВАТЕЛЬСКИЙ (Investigative - I)", 
-        "A": "АРТИСТИЧЕСКИЙ (Artistic - A)",
-        "S": "СОЦИАЛЬНЫЙ (Social - S)",
-        "E": "ПРЕДПРИНИМАТЕЛЬСКИЙ (Enterprising - E)",
-        "C": "КОНВЕНЦИОНАЛЬНЫЙ (Conventional - C)"
-    }
+    return "\n".join(
+        _format_type_block_cached(type_code, tuple(professions))
+        for type_code, professions in professions_by_type.items()
+    )
+
+# Дополнительные написания профессий, которые встречаются в ответах LLM
+PROFESSION_ALIASES = {
+    "Дата-сайентист": "Data Scientist",
+    "Специалист по данным": "Data Scientist",
+    "Веб-дизайнер": "Web-дизайнер",
+    "Рекрутер": "Хед-хантер",
+    "Эйчар": "HR-менеджер"
+}
+
+def _parse_catalog_line(line: str) -> tuple:
+    """Разобрать строку справочника на основное название и синонимы
     
-    for type_code, professions in professions_by_type.items():
-        type_name = type_names.get(type_code, type_code)
-        formatted.append(f"{type_name}:")
+    Returns:
+        tuple: (название, [синонимы])
+    """
+    aliases = []
+    # "Cloud Engineer: специалист по облачным вычислениям, ..."
+    if ": " in line:
+        head, _ = line.split(": ", 1)
+        return head.strip(), aliases
+    # "Talent-менеджер или менеджер по управлению талантами"
+    if " или " in line and "(" not in line:
+        head, alt = line.split(" или ", 1)
+        return head.strip(), [alt.strip()]
+    # "Инженер данных (Data Engineer)" — латинское пояснение считаем синонимом,
+    # русские пояснения в скобках обычно уточняют специализацию
+    for inner in re.findall(r"\(([^()]*)\)", line):
+        if re.search(r"[A-Za-z]", inner) and "," not in inner:
+            aliases.append(inner.strip())
+    base = re.sub(r"\s*\([^()]*\)", "", line).strip().rstrip(",")
+    if base and base != line:
+        aliases.append(base)
+    return line, aliases
+
+def load_professions_catalog(path: str = PROFESSIONS_FILE) -> dict:
+    """Загрузить справочник профессий вместе с синонимами
+    
+    Returns:
+        dict: {название: [синонимы]}, включая профессии из PROFESSIONS_LIST
+    """
+    catalog = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.replace("\xa0", " ").strip()
+            # Пропускаем пустые строки, прочерки и случайные пояснительные абзацы
+            if not any(ch.isalnum() for ch in line) or len(line) > 120 or " — это " in line:
+                continue
+            # "Зоолог —", "Менеджер по мотивации, компенсациям и льготам,"
+            line = line.rstrip(" —–-,;.")
+            name, aliases = _parse_catalog_line(line)
+            catalog.setdefault(name, []).extend(aliases)
+    
+    for professions in PROFESSIONS_LIST.values():
         for prof in professions:
-            formatted.append(f"   - {prof}")
-        formatted.append("") 
+            catalog.setdefault(prof, [])
+    
+    for alias, name in PROFESSION_ALIASES.items():
+        catalog.setdefault(name, []).append(alias)
     
-    return "\n".join(formatted)
\ No newline at end of file
+    return catalog
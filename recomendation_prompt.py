@@ -2,6 +2,8 @@
 # Здесь вопрос как организовать выдачу. В любом случае выбор профессии будет осуществляется через обычный алгоритм по максимальному и вторичному значению по типам 
 # холланда. В такому случае, в данном контексте ЛЛМ используется для обоснования данной выдачи. Я думаю проще сделать так, чтобы минимизировать галлюцинации
 # ЛЛМ в контексте выбора предполагаемых профессий. 
+from config import AGE_GROUPS
+
 PROFESSION_RECOMMENDATION_PROMPT = """
 Ты — CARA (Career Adaptive Research Assistant), AI-специалист по профориентации.
 Твоя задача — сгенерировать персонализированные рекомендации профессий на основе результатов теста Холланда.
@@ -43,6 +45,13 @@ PROFESSION_RECOMMENDATION_PROMPT = """
 Рекомендуемые профессии: Инженер-конструктор, Геодезист, Специалист по 3D-моделированию
 """
 
+def get_age_group(age: int) -> str:
+    """Определить возрастную группу пользователя"""
+    for upper_bound, age_group in AGE_GROUPS:
+        if upper_bound is None or age < upper_bound:
+            return age_group
+    return AGE_GROUPS[-1][1]
+
 def generate_recommendation_prompt(
     scores: dict,
     demographics: dict,
@@ -75,14 +84,7 @@ def generate_recommendation_prompt(
     
     # Определяем возрастную группу
     age = demographics.get('age', 25)
-    if age < 18:
-        age_group = "школьник"
-    elif age < 25:
-        age_group = "молодой специалист/студент"
-    elif age < 45:
-        age_group = "профессионал"
-    else:
-        age_group = "опытный специалист"
+    age_group = get_age_group(age)
     
     education = demographics.get('education', 'Среднее')
     
@@ -0,0 +1,381 @@
+# Асинхронный HTTP/WebSocket фронтенд для оркестратора.
+# Одна сессия теста на одно WebSocket-соединение плюс REST-вариант для клиентов
+# без WebSocket. Оркестратор и LLM-клиент синхронные, поэтому ход диалога
+# выполняется в пуле потоков, а event loop только принимает и отправляет сообщения.
+#
+# Нужен aiohttp (pip install -r requirements.txt).
+#
+# Запуск с фейковым LLM для локальной нагрузки:
+#   python server.py --fake-llm --fake-latency 0.2
+import argparse
+import asyncio
+import importlib
+import itertools
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from aiohttp import web, WSCloseCode, WSMsgType
+
+from orcestration import CARAOrchestrator
+from llm_scheduler import LLMScheduler, LLMBusyError, BUSY_MESSAGE
+from profession_matcher import get_profession_automaton
+from profession_search import get_search_index
+from session_memory import SessionMemoryAccountant
+
+# Размер очереди исходящих сообщений на соединение
+DEFAULT_SEND_QUEUE_SIZE = 8
+# Сколько ждать завершения текущих ходов при остановке, сек
+DEFAULT_DRAIN_TIMEOUT = 30.0
+# Через сколько секунд простоя удалять REST-сессию
+DEFAULT_SESSION_TTL = 30 * 60
+# Потоков сверх емкости планировщика LLM: для ходов, которые не вызывают LLM
+WORKER_THREADS_HEADROOM = 16
+# Число потоков без планировщика
+DEFAULT_WORKER_THREADS = 64
+
+
+class ServedSession:
+    """Сессия теста, обслуживаемая сервером"""
+
+    def __init__(self, session_id: str, orchestrator: CARAOrchestrator, transport: str):
+        self.session_id = session_id
+        self.orchestrator = orchestrator
+        # "ws" или "rest": по TTL удаляются только REST-сессии, WebSocket-сессии
+        # живут, пока открыто соединение
+        self.transport = transport
+        # Ходы одной сессии выполняются строго по очереди
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+
+
+class CARAServer:
+    """HTTP/WebSocket сервер сессий профориентационного теста"""
+
+    def __init__(
+        self,
+        llm_factory: Callable,
+        scheduler: Optional[LLMScheduler] = None,
+        memory: Optional[SessionMemoryAccountant] = None,
+        max_sessions: int = 20000,
+        send_queue_size: int = DEFAULT_SEND_QUEUE_SIZE,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+        session_ttl: float = DEFAULT_SESSION_TTL,
+        worker_threads: Optional[int] = None
+    ):
+        self.llm_factory = llm_factory
+        self.scheduler = scheduler
+        self.memory = memory or SessionMemoryAccountant()
+        self.max_sessions = max_sessions
+        self.send_queue_size = send_queue_size
+        self.drain_timeout = drain_timeout
+        self.session_ttl = session_ttl
+        # Потоков должно хватать на всю емкость планировщика, иначе ходы копились бы
+        # в очереди пула без приоритетов и лимита ожидания, и планировщик никогда
+        # не отказывал бы по переполнению своей очереди
+        if worker_threads is None:
+            worker_threads = (scheduler.max_in_flight() + WORKER_THREADS_HEADROOM
+                              if scheduler is not None else DEFAULT_WORKER_THREADS)
+        self.worker_threads = worker_threads
+        self.executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="cara-turn")
+
+        self.sessions: Dict[str, ServedSession] = {}
+        self.websockets = set()
+        self.draining = False
+        self.turns_in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._counter = itertools.count(1)
+
+    # ---------- Сессии и ходы диалога ----------
+
+    def _create_session(self, transport: str) -> ServedSession:
+        session_id = f"{next(self._counter)}-{uuid.uuid4().hex[:12]}"
+        orchestrator = CARAOrchestrator(self.llm_factory(), scheduler=self.scheduler,
+                                        memory=self.memory, session_id=session_id)
+        served = ServedSession(session_id, orchestrator, transport)
+        self.sessions[session_id] = served
+        return served
+
+    def _drop_session(self, session_id: str):
+        self.sessions.pop(session_id, None)
+        self.memory.unregister(session_id)
+
+    def _has_capacity(self) -> bool:
+        return not self.draining and len(self.sessions) < self.max_sessions
+
+    async def _run_turn(self, served: ServedSession, func: Callable, *args):
+        """Выполнить синхронный ход оркестратора в пуле потоков"""
+        async with served.lock:
+            # Допуск на event loop: если все потоки заняты, сразу отвечаем "занято",
+            # а не ставим ход в неограниченную очередь пула
+            if self.turns_in_flight >= self.worker_threads:
+                raise LLMBusyError("server", "все потоки обработки заняты")
+            self.turns_in_flight += 1
+            self._idle.clear()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, func, *args)
+            finally:
+                served.last_active = time.monotonic()
+                self.turns_in_flight -= 1
+                if not self.turns_in_flight:
+                    self._idle.set()
+
+    def _busy(self, served: ServedSession, error: LLMBusyError) -> Dict:
+        return {"type": "busy", "session_id": served.session_id, "text": BUSY_MESSAGE,
+                "state": {"busy": True, "reason": error.reason}}
+
+    async def _start(self, served: ServedSession) -> Dict:
+        try:
+            message = await self._run_turn(served, served.orchestrator.initialize_session)
+        except LLMBusyError as e:
+            return self._busy(served, e)
+        return {"type": "message", "session_id": served.session_id, "text": message,
+                "state": {"stage": served.orchestrator.session.stage}}
+
+    async def _answer(self, served: ServedSession, text: str) -> Dict:
+        try:
+            message, state = await self._run_turn(served, served.orchestrator.process_user_response, text)
+        except LLMBusyError as e:
+            return self._busy(served, e)
+        return {"type": "message", "session_id": served.session_id, "text": message, "state": state}
+
+    async def _report(self, served: ServedSession) -> Dict:
+        try:
+            report = await self._run_turn(served, served.orchestrator.get_detailed_report)
+        except LLMBusyError as e:
+            return self._busy(served, e)
+        return {"type": "report", "session_id": served.session_id, "report": report}
+
+    async def _handle_client_message(self, served: ServedSession, data) -> Dict:
+        if isinstance(data, dict) and data.get("action") == "report":
+            return await self._report(served)
+        text = _message_text(data)
+        if text is None:
+            # Пустой ответ разобрался бы как нейтральный и сдвинул тест вперед
+            return {"type": "error", "session_id": served.session_id,
+                    "text": "expected a non-empty answer: {\"text\": \"...\"}"}
+        return await self._answer(served, text)
+
+    # ---------- WebSocket ----------
+
+    async def handle_websocket(self, request: web.Request) -> web.StreamResponse:
+        if not self._has_capacity():
+            raise web.HTTPServiceUnavailable(text="server is busy or draining")
+
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.websockets.add(ws)
+        served = self._create_session("ws")
+
+        # Ограниченная очередь отправки: если клиент медленно читает, очередь
+        # заполняется, и мы перестаем читать его новые сообщения (backpressure)
+        send_queue = asyncio.Queue(maxsize=self.send_queue_size)
+        writer = asyncio.create_task(self._ws_writer(ws, send_queue))
+        try:
+            await send_queue.put(await self._start(served))
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    try:
+                        data = msg.json()
+                    except ValueError:
+                        data = msg.data
+                    await send_queue.put(await self._handle_client_message(served, data))
+                elif msg.type == WSMsgType.ERROR:
+                    break
+                if self.draining:
+                    break
+        finally:
+            await send_queue.put(None)
+            await writer
+            self.websockets.discard(ws)
+            self._drop_session(served.session_id)
+            if not ws.closed:
+                await ws.close(code=WSCloseCode.GOING_AWAY if self.draining else WSCloseCode.OK)
+        return ws
+
+    async def _ws_writer(self, ws: web.WebSocketResponse, send_queue: asyncio.Queue):
+        while True:
+            payload = await send_queue.get()
+            if payload is None:
+                return
+            if ws.closed:
+                continue
+            try:
+                # send_json дожидается записи в транспорт, поэтому медленный клиент тормозит отправку
+                await ws.send_json(payload)
+            except ConnectionResetError:
+                continue
+
+    # ---------- REST ----------
+
+    def _get_rest_session(self, request: web.Request) -> ServedSession:
+        served = self.sessions.get(request.match_info["session_id"])
+        if served is None:
+            raise web.HTTPNotFound(text="session not found")
+        return served
+
+    async def handle_create_session(self, request: web.Request) -> web.Response:
+        if not self._has_capacity():
+            raise web.HTTPServiceUnavailable(text="server is busy or draining")
+        served = self._create_session("rest")
+        result = await self._start(served)
+        if result["type"] == "busy":
+            self._drop_session(served.session_id)
+            return web.json_response(result, status=503, headers={"Retry-After": "5"})
+        return web.json_response(result, status=201)
+
+    async def handle_message(self, request: web.Request) -> web.Response:
+        if self.draining:
+            raise web.HTTPServiceUnavailable(text="server is draining")
+        served = self._get_rest_session(request)
+        try:
+            data = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="expected JSON body: {\"text\": \"...\"}")
+        result = await self._handle_client_message(served, data)
+        if result["type"] == "error":
+            return web.json_response(result, status=400)
+        if result["type"] == "busy" or result.get("state", {}).get("busy"):
+            return web.json_response(result, status=503, headers={"Retry-After": "5"})
+        return web.json_response(result)
+
+    async def handle_delete_session(self, request: web.Request) -> web.Response:
+        served = self._get_rest_session(request)
+        self._drop_session(served.session_id)
+        return web.json_response({"session_id": served.session_id, "deleted": True})
+
+    async def _expire_idle_sessions(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.session_ttl))
+            deadline = time.monotonic() - self.session_ttl
+            for session_id, served in list(self.sessions.items()):
+                # WebSocket-сессии удаляет обработчик соединения при его закрытии
+                if served.transport != "rest":
+                    continue
+                if served.last_active < deadline and not served.lock.locked():
+                    self._drop_session(session_id)
+
+    # ---------- Health / readiness ----------
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def handle_ready(self, request: web.Request) -> web.Response:
+        body = {
+            "ready": self._has_capacity(),
+            "draining": self.draining,
+            "sessions": len(self.sessions),
+            "websockets": len(self.websockets),
+            "turns_in_flight": self.turns_in_flight,
+            "worker_threads": self.worker_threads
+        }
+        if self.scheduler is not None:
+            body["llm_queues"] = self.scheduler.get_stats()
+        return web.json_response(body, status=200 if body["ready"] else 503)
+
+    async def handle_memory_debug(self, request: web.Request) -> web.Response:
+        try:
+            top = int(request.query.get("top", 10))
+        except ValueError:
+            raise web.HTTPBadRequest(text="top must be an integer")
+        return web.json_response({
+            "policy": self.memory.policy,
+            "sessions": len(self.memory.usage),
+            "top": self.memory.top_sessions(top)
+        })
+
+    # ---------- Жизненный цикл ----------
+
+    async def _on_startup(self, app: web.Application):
+        # Индексы по справочнику профессий строим до приема запросов,
+        # чтобы их построение не попадало на ход первого пользователя
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, get_search_index)
+        await loop.run_in_executor(self.executor, get_profession_automaton)
+        app["session_expiry"] = asyncio.create_task(self._expire_idle_sessions())
+
+    async def _on_shutdown(self, app: web.Application):
+        # Перестаем принимать новые сессии и ждем, пока закончатся текущие ходы
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        for ws in list(self.websockets):
+            await ws.close(code=WSCloseCode.GOING_AWAY, message=b"server shutdown")
+
+    async def _on_cleanup(self, app: web.Application):
+        app["session_expiry"].cancel()
+        self.executor.shutdown(wait=False)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/health", self.handle_health),
+            web.get("/ready", self.handle_ready),
+            web.get("/ws", self.handle_websocket),
+            web.get("/debug/sessions/memory", self.handle_memory_debug),
+            web.post("/sessions", self.handle_create_session),
+            web.post("/sessions/{session_id}/messages", self.handle_message),
+            web.delete("/sessions/{session_id}", self.handle_delete_session)
+        ])
+        app.on_startup.append(self._on_startup)
+        app.on_shutdown.append(self._on_shutdown)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+
+def _message_text(data) -> Optional[str]:
+    """Текст ответа из сообщения клиента (JSON {"text": ...} или просто строка); None, если его нет"""
+    text = data.get("text") if isinstance(data, dict) else data
+    if not isinstance(text, str) or not text.strip():
+        return None
+    return text
+
+
+def _load_llm_factory(path: str) -> Callable:
+    """Загрузить фабрику LLM-клиента по пути вида "module:callable" """
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/WebSocket сервер CARA")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--llm-factory", help="фабрика LLM-клиента, например my_llm:create_client")
+    parser.add_argument("--fake-llm", action="store_true", help="использовать фейковый LLM")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="задержка фейкового LLM, сек")
+    parser.add_argument("--no-scheduler", action="store_true", help="вызывать LLM без планировщика")
+    parser.add_argument("--max-sessions", type=int, default=20000)
+    parser.add_argument("--send-queue-size", type=int, default=DEFAULT_SEND_QUEUE_SIZE)
+    parser.add_argument("--drain-timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT)
+    parser.add_argument("--worker-threads", type=int, default=None,
+                        help="потоков для ходов (по умолчанию емкость планировщика + запас)")
+    args = parser.parse_args()
+
+    if args.fake_llm:
+        from fake_llm import FakeLLMClient
+        llm_factory = lambda: FakeLLMClient(latency=args.fake_latency)
+    elif args.llm_factory:
+        llm_factory = _load_llm_factory(args.llm_factory)
+    else:
+        parser.error("укажите --llm-factory или --fake-llm")
+
+    server = CARAServer(
+        llm_factory,
+        scheduler=None if args.no_scheduler else LLMScheduler(),
+        max_sessions=args.max_sessions,
+        send_queue_size=args.send_queue_size,
+        drain_timeout=args.drain_timeout,
+        worker_threads=args.worker_threads
+    )
+    web.run_app(server.build_app(), host=args.host, port=args.port,
+                shutdown_timeout=args.drain_timeout)
+
+
+if __name__ == "__main__":
+    main()
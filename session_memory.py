@@ -0,0 +1,190 @@
+# Учет памяти, которую удерживает каждая сессия теста.
+# В сессии хранятся последний промпт, ответы LLM и вся история вопросов/ответов.
+# Многословная модель или пользователь, вставивший огромный текст, могут раздуть
+# воркер, поэтому размер сессии считается после каждого хода и приводится к лимитам.
+import heapq
+import json
+import os
+import sys
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+from config import (
+    SESSION_MAX_PROMPT_BYTES,
+    SESSION_MAX_HISTORY_BYTES,
+    SESSION_MAX_LLM_OUTPUT_BYTES,
+    SESSION_MAX_ANSWER_CHARS,
+    SESSION_MEMORY_POLICY,
+    SESSION_SPILL_DIR
+)
+
+TRUNCATED_MARK = "…[обрезано]"
+MEMORY_POLICIES = ("truncate", "spill", "drop_oldest")
+
+
+def estimate_size(obj) -> int:
+    """Приблизительный размер объекта в байтах вместе с вложенными строками и контейнерами"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
+def truncate_text(text: Optional[str], max_bytes: int) -> Optional[str]:
+    """Обрезать строку так, чтобы она занимала не больше max_bytes"""
+    if not text:
+        return text
+    size = sys.getsizeof(text)
+    if size <= max_bytes:
+        return text
+    keep = max(0, int(len(text) * max_bytes / size) - len(TRUNCATED_MARK))
+    return text[:keep] + TRUNCATED_MARK
+
+
+class SessionMemoryAccountant:
+    """Учет и ограничение памяти сессий оркестратора
+
+    Один объект на процесс: хранит лимиты и последние замеры по всем сессиям.
+    Ходы сессий выполняются в разных потоках, поэтому замеры защищены блокировкой.
+    """
+
+    def __init__(
+        self,
+        max_prompt_bytes: int = SESSION_MAX_PROMPT_BYTES,
+        max_history_bytes: int = SESSION_MAX_HISTORY_BYTES,
+        max_llm_output_bytes: int = SESSION_MAX_LLM_OUTPUT_BYTES,
+        max_answer_chars: int = SESSION_MAX_ANSWER_CHARS,
+        policy: str = SESSION_MEMORY_POLICY,
+        spill_dir: str = SESSION_SPILL_DIR
+    ):
+        if policy not in MEMORY_POLICIES:
+            raise ValueError(f"Неизвестная политика памяти: {policy}")
+        self.max_prompt_bytes = max_prompt_bytes
+        self.max_history_bytes = max_history_bytes
+        self.max_llm_output_bytes = max_llm_output_bytes
+        self.max_answer_chars = max_answer_chars
+        self.policy = policy
+        # Путь фиксируется при создании, чтобы смена рабочего каталога не теряла файлы
+        self.spill_dir = os.path.abspath(spill_dir)
+        self.usage = {}
+        self._lock = threading.Lock()
+
+    def register(self, orchestrator):
+        """Начать учет сессии; запись удаляется вместе с оркестратором"""
+        session_id = orchestrator.session_id
+        usage = self.measure(orchestrator)
+        with self._lock:
+            self.usage[session_id] = usage
+        weakref.finalize(orchestrator, self.unregister, session_id)
+
+    def unregister(self, session_id: str):
+        """Прекратить учет сессии и удалить ее файл выгрузки"""
+        with self._lock:
+            self.usage.pop(session_id, None)
+            try:
+                os.remove(self.spill_path(session_id))
+            except FileNotFoundError:
+                pass
+
+    def spill_path(self, session_id: str) -> str:
+        """Файл, в который выгружается история сессии при политике spill"""
+        return os.path.join(self.spill_dir, f"{session_id}.jsonl")
+
+    def limit_answer(self, answer: str) -> str:
+        """Обрезать ответ пользователя перед разбором"""
+        if len(answer) > self.max_answer_chars:
+            return answer[:self.max_answer_chars]
+        return answer
+
+    def measure(self, orchestrator) -> Dict:
+        """Замерить память сессии по категориям"""
+        check = orchestrator.last_recommendation_check
+        usage = {
+            "stage": orchestrator.session.stage,
+            "prompt": estimate_size(orchestrator.current_prompt),
+            "history": estimate_size(orchestrator.session.history),
+            "llm_outputs": estimate_size(orchestrator.last_question) + estimate_size(check),
+            "spilled_entries": sum(1 for item in orchestrator.session.history if item.get("spilled"))
+        }
+        usage["total"] = usage["prompt"] + usage["history"] + usage["llm_outputs"]
+        return usage
+
+    def enforce(self, orchestrator) -> Dict:
+        """Привести сессию к лимитам и обновить замер
+
+        Returns:
+            dict: замер памяти после применения лимитов
+        """
+        session_id = orchestrator.session_id
+        with self._lock:
+            registered = session_id in self.usage
+        if not registered:
+            # Сессию удалили во время хода: не возвращаем ее в учет и не пишем файл выгрузки
+            return self.measure(orchestrator)
+
+        orchestrator.current_prompt = truncate_text(orchestrator.current_prompt, self.max_prompt_bytes)
+        orchestrator.last_question = truncate_text(orchestrator.last_question, self.max_llm_output_bytes)
+        check = orchestrator.last_recommendation_check
+        if check and estimate_size(check) > self.max_llm_output_bytes:
+            # Для отчета достаточно списков профессий, позиции упоминаний можно отбросить
+            check["mentions"] = []
+            check["text"] = truncate_text(check["text"], self.max_llm_output_bytes)
+
+        history = orchestrator.session.history
+        if estimate_size(history) > self.max_history_bytes:
+            if self.policy == "truncate":
+                self._truncate_history(history)
+            else:
+                # Под блокировкой, чтобы unregister не удалил файл между проверкой и записью
+                with self._lock:
+                    if session_id in self.usage:
+                        self._evict_history(session_id, history, spill=self.policy == "spill")
+
+        usage = self.measure(orchestrator)
+        with self._lock:
+            if session_id in self.usage:
+                self.usage[session_id] = usage
+        return usage
+
+    def _truncate_history(self, history: List[Dict]):
+        # Делим лимит поровну между записями и обрезаем тексты, которые в него не влезают
+        budget = self.max_history_bytes // (2 * len(history))
+        for item in history:
+            for field in ("question", "answer"):
+                if item.get(field):
+                    item[field] = truncate_text(item[field], budget)
+
+    def _evict_history(self, session_id: str, history: List[Dict], spill: bool):
+        # Тип и балл остаются в истории: по ним считается прогресс теста
+        spill_file = None
+        try:
+            for index, item in enumerate(history):
+                if estimate_size(history) <= self.max_history_bytes:
+                    break
+                if item.get("spilled") or item.get("dropped"):
+                    continue
+                if spill:
+                    if spill_file is None:
+                        os.makedirs(self.spill_dir, exist_ok=True)
+                        spill_file = open(self.spill_path(session_id), "a", encoding="utf-8")
+                    record = {"session_id": session_id, "index": index,
+                              "question": item.get("question"), "answer": item.get("answer")}
+                    spill_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    item["spilled"] = True
+                else:
+                    item["dropped"] = True
+                item.pop("question", None)
+                item.pop("answer", None)
+        finally:
+            if spill_file is not None:
+                spill_file.close()
+
+    def top_sessions(self, n: int = 10) -> List[Dict]:
+        """Топ-N сессий по занимаемой памяти (по последним замерам)"""
+        with self._lock:
+            items = list(self.usage.items())
+        top = heapq.nlargest(n, items, key=lambda item: item[1]["total"])
+        return [dict(usage, session_id=session_id) for session_id, usage in top]
@@ -0,0 +1,208 @@
+# Симулятор синтетических респондентов для оценки стоимости теста.
+# У каждого респондента есть скрытый RIASEC-профиль; он отвечает на вопросы
+# оркестратора с шумом, используя словарь parse_answer_score. Прогоны идут
+# параллельно против фейкового LLM, а в отчет попадают число вызовов LLM,
+# токены, модельное время на один тест и то, насколько точно итоговый
+# код Холланда восстанавливает скрытый.
+#
+# Ответы на уточняющие вопросы оркестратор пока не учитывает в баллах, поэтому
+# --clarifications меняет только стоимость теста, но не точность (в сводке это
+# отражено полем clarification_answers_scored).
+#
+# Пример:
+#   python simulator.py --respondents 500 --workers 8 --noise 0.7 --clarifications 3
+import argparse
+import json
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List
+
+from config import HOLLAND_TYPES_ORDER, EDUCATION_LEVELS, GENDERS
+from fake_llm import FakeLLMClient
+from holland_session import HollandTestSession, DEFAULT_MAX_CLARIFICATION_QUESTIONS
+from orcestration import CARAOrchestrator
+
+# Ответы шкалы в том виде, в каком их понимает parse_answer_score
+ANSWER_PHRASES = {
+    2: "Определенно да",
+    1: "Скорее да",
+    0: "Нейтрально",
+    -1: "Скорее нет",
+    -2: "Определенно нет"
+}
+# Свободные формулировки, которые люди пишут вместо вариантов шкалы.
+# Каждая разбирается parse_answer_score ровно в балл своего ключа, чтобы
+# свободный текст не сжимал крайние ответы и не искажал точность
+FREE_TEXT_PHRASES = {
+    2: "определенно да, это про меня",
+    1: "да",
+    0: "затрудняюсь ответить",
+    -1: "нет",
+    -2: "нет, определенно нет"
+}
+# Защита от зацикливания, если оркестратор не дойдет до завершения
+MAX_TURNS = 50
+
+
+class SyntheticRespondent:
+    """Респондент со скрытым профилем и шумными ответами"""
+
+    def __init__(self, seed: int, noise: float = 0.7, free_text_rate: float = 0.1):
+        self.rng = random.Random(seed)
+        self.noise = noise
+        self.free_text_rate = free_text_rate
+        self.latent = {type_code: self.rng.uniform(-2, 2) for type_code in HOLLAND_TYPES_ORDER}
+        self.age = self.rng.randint(14, 70)
+        self.gender = self.rng.choice(GENDERS)
+        self.education = self.rng.choice(EDUCATION_LEVELS)
+
+    def latent_code(self, n: int = 3) -> str:
+        """Скрытый код Холланда из N наиболее выраженных типов"""
+        sorted_types = sorted(self.latent.items(), key=lambda x: x[1], reverse=True)
+        return "".join(type_code for type_code, _ in sorted_types[:n])
+
+    def answer_demographics(self) -> str:
+        return f"{self.gender}\n{self.age}\n{self.education}"
+
+    def answer_type_question(self, type_code: str) -> str:
+        score = round(self.latent[type_code] + self.rng.gauss(0, self.noise))
+        score = max(-2, min(2, score))
+        if self.rng.random() < self.free_text_rate:
+            return FREE_TEXT_PHRASES[score]
+        return ANSWER_PHRASES[score]
+
+    def answer_clarification(self) -> str:
+        return self.rng.choice(list(ANSWER_PHRASES.values()))
+
+
+def _code_overlap(code_a: str, code_b: str) -> float:
+    return len(set(code_a) & set(code_b)) / max(len(code_a), 1)
+
+
+def simulate_respondent(
+    seed: int,
+    noise: float,
+    max_clarification_questions: int,
+    with_report: bool
+) -> Dict:
+    """Провести одного синтетического респондента через весь тест"""
+    respondent = SyntheticRespondent(seed, noise=noise)
+    llm = FakeLLMClient()
+    session = HollandTestSession(max_clarification_questions=max_clarification_questions)
+    orchestrator = CARAOrchestrator(llm, session=session)
+
+    orchestrator.initialize_session()
+    stage = session.stage
+    turns = 0
+    while stage != "completed" and turns < MAX_TURNS:
+        if stage == "demographics":
+            answer = respondent.answer_demographics()
+        elif stage == "basic_test":
+            answer = respondent.answer_type_question(orchestrator.current_type)
+        else:
+            answer = respondent.answer_clarification()
+        _, state_info = orchestrator.process_user_response(answer)
+        stage = state_info.get("stage", session.stage)
+        turns += 1
+
+    if with_report and stage == "completed":
+        orchestrator.get_detailed_report()
+
+    final_code = session.get_top_code()
+    latent_code = respondent.latent_code()
+    result = {"seed": seed, "completed": stage == "completed", "turns": turns,
+              "latent_code": latent_code, "final_code": final_code,
+              "exact_match": final_code == latent_code,
+              "first_type_match": final_code[:1] == latent_code[:1],
+              "overlap": _code_overlap(final_code, latent_code)}
+    result.update(llm.get_usage())
+    return result
+
+
+def _distribution(values: List[float]) -> Dict:
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1]
+    }
+
+
+def run_simulation(
+    respondents: int = 100,
+    workers: int = 4,
+    noise: float = 0.7,
+    max_clarification_questions: int = DEFAULT_MAX_CLARIFICATION_QUESTIONS,
+    with_report: bool = False,
+    seed: int = 0
+) -> Dict:
+    """Прогнать синтетических респондентов параллельно и собрать сводку
+
+    Returns:
+        dict: метрики стоимости и точности на один завершенный тест
+    """
+    # Фейковый LLM не ждет, так что прогон упирается в CPU: нужны процессы, а не потоки
+    run_one = partial(simulate_respondent, noise=noise,
+                      max_clarification_questions=max_clarification_questions,
+                      with_report=with_report)
+    seeds = range(seed, seed + respondents)
+    if workers <= 1:
+        results = [run_one(respondent_seed) for respondent_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_one, seeds, chunksize=max(1, respondents // (workers * 4))))
+
+    completed = [r for r in results if r["completed"]]
+    summary = {
+        "respondents": respondents,
+        "completed": len(completed),
+        "noise": noise,
+        "max_clarification_questions": max_clarification_questions,
+        # Ответы на уточнения не меняют баллы, поэтому не влияют на точность
+        "clarification_answers_scored": False,
+        "with_report": with_report
+    }
+    if not completed:
+        return summary
+
+    summary.update({
+        "llm_calls": _distribution([r["calls"] for r in completed]),
+        "prompt_tokens": _distribution([r["prompt_tokens"] for r in completed]),
+        "completion_tokens": _distribution([r["completion_tokens"] for r in completed]),
+        "simulated_time_sec": _distribution([r["simulated_time"] for r in completed]),
+        "accuracy": {
+            "exact_top3": sum(r["exact_match"] for r in completed) / len(completed),
+            "first_type": sum(r["first_type_match"] for r in completed) / len(completed),
+            "mean_top3_overlap": statistics.fmean(r["overlap"] for r in completed)
+        }
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Симуляция синтетических респондентов теста CARA")
+    parser.add_argument("--respondents", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--noise", type=float, default=0.7, help="СКО шума в ответах (в баллах шкалы)")
+    parser.add_argument("--clarifications", type=int, default=DEFAULT_MAX_CLARIFICATION_QUESTIONS,
+                        help="лимит уточняющих вопросов в сессии")
+    parser.add_argument("--with-report", action="store_true", help="генерировать итоговый отчет с рекомендациями")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    summary = run_simulation(
+        respondents=args.respondents,
+        workers=args.workers,
+        noise=args.noise,
+        max_clarification_questions=args.clarifications,
+        with_report=args.with_report,
+        seed=args.seed
+    )
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()